@@ -1,6 +1,10 @@
+import os
+
 import streamlit as st
-import random
-from math import radians, sin, cos, sqrt, atan2
+from instrumentation import Tracer, debug_panel
+from queue_sim import current_wait_distribution
+from recommender import StationIndex, simulate_station_data, stations
+from station_feed import DEFAULT_PORT, StationFeedService
 
 # Set the page to a wide layout for better display
 st.set_page_config(
@@ -10,44 +14,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Fixed station data
-stations = [
-    {"name": "Connaught Place", "lat": 28.6315, "lon": 77.2167},
-    {"name": "Saket", "lat": 28.5222, "lon": 77.2066},
-    {"name": "Dwarka", "lat": 28.5921, "lon": 77.0460},
-    {"name": "Karol Bagh", "lat": 28.6512, "lon": 77.1905},
-    {"name": "Lajpat Nagar", "lat": 28.5672, "lon": 77.2436},
-    {"name": "Rajouri Garden", "lat": 28.6426, "lon": 77.1197},
-    {"name": "Vasant Kunj", "lat": 28.5206, "lon": 77.1571},
-    {"name": "Preet Vihar", "lat": 28.6469, "lon": 77.3024},
-    {"name": "Rohini", "lat": 28.7499, "lon": 77.0560},
-    {"name": "Nehru Place", "lat": 28.5483, "lon": 77.2513},
-]
-
-# Simulate station data
-def simulate_station_data():
-    data = []
-    for s in stations:
-        car_ports = random.randint(2, 6)
-        scooter_ports = random.randint(3, 8)
-        car_waiting = random.randint(0, car_ports)
-        scooter_waiting = random.randint(0, scooter_ports)
-        car_session = random.randint(30, 90)  # minutes
-        scooter_session = random.randint(20, 60)
-        traffic_speed = random.randint(15, 30)
-        data.append({
-            "name": s["name"],
-            "lat": s["lat"],
-            "lon": s["lon"],
-            "car_ports": car_ports,
-            "scooter_ports": scooter_ports,
-            "car_waiting": car_waiting,
-            "scooter_waiting": scooter_waiting,
-            "car_session": car_session,
-            "scooter_session": scooter_session,
-            "traffic_speed": traffic_speed,
-        })
-    return data
+# Stage timings for this rerun; a no-op unless the sidebar debug panel is on
+tracer = Tracer(enabled=st.session_state.get("debug_panel", False), name="recommender")
 
 # --- HEADER ---
 # Colors adjusted for dark mode
@@ -66,6 +34,10 @@ with st.sidebar:
     user_lat = st.number_input("Current Latitude", value=28.6, format="%.4f")
     user_lon = st.number_input("Current Longitude", value=77.2, format="%.4f")
     vehicle_type = st.radio("Vehicle Type", ["car", "scooter"], horizontal=True)
+    top_k = st.slider("Stations to show", 1, max(len(stations), 1), len(stations))
+    max_travel = st.number_input("Max travel time (min, 0 = no limit)", min_value=0, value=0, step=5)
+    queue_model = st.radio("Queue Estimate", ["Formula", "Simulated p50", "Simulated p95"], horizontal=True)
+    st.checkbox("Debug panel", key="debug_panel", help="Per-rerun stage timings and feed counters")
     st.markdown("<hr style='border-color: #4b5563;'>", unsafe_allow_html=True)
     # Tip box colors adjusted for dark mode
     st.markdown(
@@ -85,41 +57,43 @@ with st.sidebar:
         unsafe_allow_html=True
     )
 
-# --- HELPER FUNCTIONS ---
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return R * c
+# --- LIVE STATION STATE ---
+@st.cache_resource
+def get_station_feed():
+    # One feed per server process, shared by every session. It listens for JSON-line
+    # updates on EV_FEED_PORT (e.g. `python station_feed.py`); with EV_FEED_MODE=simulate
+    # (the default) an in-process simulator also keeps the state moving.
+    feed = StationFeedService()
+    for state in simulate_station_data():
+        feed.store.apply(state)
+    return feed.start(
+        port=int(os.environ.get("EV_FEED_PORT", DEFAULT_PORT)),
+        simulate=os.environ.get("EV_FEED_MODE", "simulate") == "simulate",
+    )
 
-def compute_eta(station, user_lat, user_lon, vehicle_type):
-    if vehicle_type == "car":
-        ports, waiting, avg_session = station["car_ports"], station["car_waiting"], station["car_session"]
-    else:
-        ports, waiting, avg_session = station["scooter_ports"], station["scooter_waiting"], station["scooter_session"]
-    
-    distance = haversine(user_lat, user_lon, station["lat"], station["lon"])
-    queue_time = (waiting / ports) * avg_session if ports > 0 else 0
-    travel_time = (distance / station["traffic_speed"]) * 60 if station["traffic_speed"] > 0 else 0
-    total_eta = queue_time + travel_time
-    
-    return {
-        **station,
-        "distance_km": round(distance, 2),
-        "queue_time": round(queue_time, 1),
-        "travel_time": round(travel_time, 1),
-        "total_eta": round(total_eta, 1),
-        "recommended": False,
-    }
 
 # --- DATA PROCESSING ---
-station_data = simulate_station_data()
-annotated = [compute_eta(s, user_lat, user_lon, vehicle_type) for s in station_data]
-annotated.sort(key=lambda x: x["total_eta"])
-if annotated:
-    annotated[0]["recommended"] = True
+# Latest state of every station, read without waiting on the feed
+with tracer.span("feed_snapshot"):
+    feed = get_station_feed()
+    station_data = feed.store.snapshot([s["name"] for s in stations])
+tracer.gauge("stations", len(station_data))
+tracer.gauge("feed_updates", feed.store.updates)
+# Only stations reachable within the travel bound are scored; the best one is marked recommended
+queue_times = None
+if queue_model != "Formula":
+    # Discrete-event simulation of the current queue at every station
+    with tracer.span("queue_simulation"):
+        p50, p95 = current_wait_distribution(
+            [s[f"{vehicle_type}_ports"] for s in station_data],
+            [s[f"{vehicle_type}_waiting"] for s in station_data],
+            [s[f"{vehicle_type}_session"] for s in station_data],
+        )
+    queue_times = {vehicle_type: p50 if queue_model == "Simulated p50" else p95}
+with tracer.span("build_index"):
+    index = StationIndex(station_data, queue_times=queue_times)
+with tracer.span("nearest_k", k=top_k):
+    annotated = index.nearest_k(user_lat, user_lon, vehicle_type, k=top_k, max_travel_minutes=max_travel or None)
 
 # --- SUBHEADER ---
 # Color adjusted for dark mode
@@ -141,30 +115,36 @@ card_style = """
     max-width: 600px;
 """
 
-for i in range(0, len(annotated), 2):
-    cols = st.columns(2)
-    for j in range(2):
-        if i + j < len(annotated):
-            s = annotated[i + j]
-            # Recommended badge colors adjusted for dark mode
-            recommended_badge = "<span style='background:#3b82f6; color:#ffffff; border-radius:6px; padding:2px 10px; font-weight:700; font-size:0.9em; margin-left:8px;'>✅ Recommended</span>" if s["recommended"] else ""
-            with cols[j]:
-                # All text and accent colors adjusted for dark mode
-                st.markdown(f"""
-                    <div style='{card_style}'>
-                        <h3 style='color:#93c5fd; margin-bottom:0.2em; font-size:1.25em;'>{s['name']} {recommended_badge}</h3>
-                        <div style='margin-top:4px; margin-bottom:6px;'>
-                            <span style='font-size:1em; color:#93c5fd; font-weight:600;'>
-                                {'🚗 Car' if vehicle_type=='car' else '🛵 Scooter'}
-                            </span>
+if not annotated:
+    st.info("No stations within the selected travel time. Increase the limit to see more stations.")
+
+with tracer.span("render_cards"):
+    for i in range(0, len(annotated), 2):
+        cols = st.columns(2)
+        for j in range(2):
+            if i + j < len(annotated):
+                s = annotated[i + j]
+                # Recommended badge colors adjusted for dark mode
+                recommended_badge = "<span style='background:#3b82f6; color:#ffffff; border-radius:6px; padding:2px 10px; font-weight:700; font-size:0.9em; margin-left:8px;'>✅ Recommended</span>" if s["recommended"] else ""
+                with cols[j]:
+                    # All text and accent colors adjusted for dark mode
+                    st.markdown(f"""
+                        <div style='{card_style}'>
+                            <h3 style='color:#93c5fd; margin-bottom:0.2em; font-size:1.25em;'>{s['name']} {recommended_badge}</h3>
+                            <div style='margin-top:4px; margin-bottom:6px;'>
+                                <span style='font-size:1em; color:#93c5fd; font-weight:600;'>
+                                    {'🚗 Car' if vehicle_type=='car' else '🛵 Scooter'}
+                                </span>
+                            </div>
+                            <ul style='list-style:none; padding-left:0; color:#e5e7eb; font-size:0.98em;'>
+                                <li><b style='color:#60a5fa;'>Ports:</b> {s['car_ports'] if vehicle_type=='car' else s['scooter_ports']} &nbsp; | &nbsp; <b style='color:#60a5fa;'>Queue:</b> {s['car_waiting'] if vehicle_type=='car' else s['scooter_waiting']}</li>
+                                <li><b style='color:#60a5fa;'>Avg Session:</b> {s['car_session'] if vehicle_type=='car' else s['scooter_session']} min</li>
+                                <li><b style='color:#60a5fa;'>Distance:</b> {s['distance_km']} km</li>
+                                <li><b style='color:#60a5fa;'>Travel Time:</b> {s['travel_time']} min</li>
+                                <li><b style='color:#60a5fa;'>Queue Time:</b> {s['queue_time']} min</li>
+                                <li style='color:#93c5fd; font-weight:700; margin-top:5px;'><b>Total ETA:</b> {s['total_eta']} min</li>
+                            </ul>
                         </div>
-                        <ul style='list-style:none; padding-left:0; color:#e5e7eb; font-size:0.98em;'>
-                            <li><b style='color:#60a5fa;'>Ports:</b> {s['car_ports'] if vehicle_type=='car' else s['scooter_ports']} &nbsp; | &nbsp; <b style='color:#60a5fa;'>Queue:</b> {s['car_waiting'] if vehicle_type=='car' else s['scooter_waiting']}</li>
-                            <li><b style='color:#60a5fa;'>Avg Session:</b> {s['car_session'] if vehicle_type=='car' else s['scooter_session']} min</li>
-                            <li><b style='color:#60a5fa;'>Distance:</b> {s['distance_km']} km</li>
-                            <li><b style='color:#60a5fa;'>Travel Time:</b> {s['travel_time']} min</li>
-                            <li><b style='color:#60a5fa;'>Queue Time:</b> {s['queue_time']} min</li>
-                            <li style='color:#93c5fd; font-weight:700; margin-top:5px;'><b>Total ETA:</b> {s['total_eta']} min</li>
-                        </ul>
-                    </div>
-                """, unsafe_allow_html=True)
\ No newline at end of file
+                    """, unsafe_allow_html=True)
+
+debug_panel(tracer, "Debug: stage timings for this rerun")
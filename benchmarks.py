@@ -0,0 +1,244 @@
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from ev_forecast_analysis import FORECAST_PERIODS, build_tasks, forecast_all, future_index
+from forecasters import get_forecaster
+from overload_analysis import get_overloaded_stations, overload_probability
+from recommender import StationIndex, compute_eta, haversine, haversine_np, make_charger_stations, simulate_station_data
+from simulate_ev_data import VEHICLE_TYPES, simulate_ev_data
+from solar_suitability import SolarSuitability
+
+DEFAULT_SIZES = ["10x7x2", "100x7x2", "100x30x2", "1000x7x2"]
+DEFAULT_THRESHOLD = 0.25
+
+
+def parse_size(text):
+    # "STATIONSxDAYS[xVEHICLE_TYPES]", e.g. 100x30 or 100x30x1
+    parts = [int(p) for p in text.lower().split("x")]
+    if len(parts) == 2:
+        parts.append(len(VEHICLE_TYPES))
+    if len(parts) != 3 or min(parts) < 1 or parts[2] > len(VEHICLE_TYPES):
+        raise argparse.ArgumentTypeError(f"size must look like 100x7 or 100x7x2, got {text!r}")
+    return {"stations": parts[0], "days": parts[1], "vehicle_types": parts[2]}
+
+
+def measure(func, repeats=3):
+    # Best and mean wall time over `repeats` runs, then one traced run for peak memory
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "wall_time_s": min(times),
+        "mean_time_s": float(np.mean(times)),
+        "repeats": repeats,
+        "peak_mem_mb": peak / 2**20,
+    }
+
+
+def sample_data(size, seed=0):
+    df = simulate_ev_data(size["stations"], size["days"], seed=seed)
+    df = df[df["vehicle_type"].isin(VEHICLE_TYPES[:size["vehicle_types"]])]
+    df["ds"] = pd.to_datetime(df["date"], format="%d-%m-%Y") + pd.to_timedelta(df["hour"], unit="h")
+    return df
+
+
+def forecast_frame(tasks):
+    # Forecasts shaped like the dashboard's forecast_df, for the overload stage
+    forecast_all(tasks, "seasonal")
+    return pd.concat([
+        t["forecast"].assign(station_id=t["station_id"], station_name=t["station_name"], vehicle_type=t["vehicle_type"])
+        for t in tasks
+    ], ignore_index=True)
+
+
+def bench_simulate(size, repeats, **_):
+    return {"simulate_ev_data": measure(lambda: simulate_ev_data(size["stations"], size["days"], seed=0), repeats)}
+
+
+def bench_forecast(size, repeats, prophet_series=2, **_):
+    tasks = build_tasks(sample_data(size), plot=False)
+    results = {"forecast_seasonal_all": measure(lambda: forecast_all(tasks, "seasonal"), repeats)}
+    if prophet_series:
+        # Per-series Prophet fit + predict as in forecast_series; reported per series
+        # since a full run is n_series times this
+        forecaster = get_forecaster("prophet")
+        sample = tasks[:prophet_series]
+
+        def fit_predict():
+            for task in sample:
+                future = pd.DataFrame({"ds": future_index(task["ts"]["ds"], FORECAST_PERIODS)})
+                forecaster.fit(task["ts"]).predict(future)
+
+        stats = measure(fit_predict, repeats=1)
+        stats["wall_time_s"] /= len(sample)
+        stats["mean_time_s"] /= len(sample)
+        stats["series_sampled"] = len(sample)
+        results["prophet_fit_predict_per_series"] = stats
+    return results
+
+
+def bench_overload(size, repeats, **_):
+    tasks = build_tasks(sample_data(size), plot=False)
+    forecast_df = forecast_frame(tasks)
+    capacity = {t["station_name"]: {v: 25 for v in VEHICLE_TYPES} for t in tasks}
+    return {
+        "get_overloaded_stations": measure(lambda: get_overloaded_stations(forecast_df, capacity), repeats),
+        "overload_probability_2000_draws": measure(lambda: overload_probability(forecast_df, capacity, seed=0), repeats),
+    }
+
+
+def bench_eta(size, repeats, **_):
+    # One user against every station; scalar path from app.py vs the vectorized/indexed ones
+    station_data = simulate_station_data(make_charger_stations(size["stations"], seed=0))
+    lat, lon = 28.6, 77.2
+    lats = np.array([s["lat"] for s in station_data])
+    lons = np.array([s["lon"] for s in station_data])
+    index = StationIndex(station_data)
+    return {
+        "haversine": measure(lambda: [haversine(lat, lon, s["lat"], s["lon"]) for s in station_data], repeats),
+        "haversine_np": measure(lambda: haversine_np(lat, lon, lats, lons), repeats),
+        "compute_eta": measure(lambda: [compute_eta(s, lat, lon, "car") for s in station_data], repeats),
+        "station_index_top5": measure(lambda: index.nearest_k(lat, lon, "car", k=5), repeats),
+    }
+
+
+def bench_solar(size, repeats, **_):
+    # Full fold of the history, then the cost of appending one more day to it
+    df = sample_data(size).drop(columns="ds")
+    engine = SolarSuitability().update(df)
+    daily = np.random.default_rng(0).poisson(50, len(engine)).astype(float)
+    days = iter(pd.date_range(engine.last_day + pd.Timedelta(days=1), periods=repeats + 1))
+    return {
+        "solar_update_history": measure(lambda: SolarSuitability().update(df), repeats),
+        "solar_add_day": measure(lambda: engine.add_day(next(days), engine.names, daily, daily), repeats),
+        "solar_top10": measure(lambda: engine.top(10), repeats),
+    }
+
+
+BENCHMARKS = {
+    "simulate": bench_simulate,
+    "forecast": bench_forecast,
+    "overload": bench_overload,
+    "eta": bench_eta,
+    "solar": bench_solar,
+}
+# Groups whose work does not depend on the vehicle-type count: simulate_ev_data always
+# draws every type and the ETA benchmarks score one car user. They run once per
+# stations x days and are reported with every vehicle type.
+TYPE_INDEPENDENT = {"simulate", "eta"}
+
+
+def run(sizes, groups, repeats=3, prophet_series=2, log=print):
+    results = []
+    done = set()
+    for size in sizes:
+        for group in groups:
+            group_size = size
+            if group in TYPE_INDEPENDENT:
+                if (group, size["stations"], size["days"]) in done:
+                    continue
+                done.add((group, size["stations"], size["days"]))
+                group_size = {**size, "vehicle_types": len(VEHICLE_TYPES)}
+            for name, stats in BENCHMARKS[group](group_size, repeats, prophet_series=prophet_series).items():
+                row = {"benchmark": name, "group": group, **group_size, **stats}
+                results.append(row)
+                log(f"{name:32s} {group_size['stations']:>6}x{group_size['days']}x{group_size['vehicle_types']}  "
+                    f"{stats['wall_time_s'] * 1000:10.2f} ms  {stats['peak_mem_mb']:8.2f} MB")
+    return results
+
+
+def environment():
+    import pandas
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pandas.__version__,
+    }
+
+
+def result_key(row):
+    return row["benchmark"], row["stations"], row["days"], row["vehicle_types"]
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    # Ratio of current to baseline wall time and peak memory for every benchmark in both;
+    # regressed when either grows by more than `threshold`
+    base = {result_key(r): r for r in baseline}
+    rows = []
+    for r in results:
+        b = base.get(result_key(r))
+        if b is None:
+            continue
+        time_ratio = r["wall_time_s"] / b["wall_time_s"] if b["wall_time_s"] else np.nan
+        mem_ratio = r["peak_mem_mb"] / b["peak_mem_mb"] if b["peak_mem_mb"] else np.nan
+        rows.append({
+            "benchmark": r["benchmark"],
+            "stations": r["stations"],
+            "days": r["days"],
+            "vehicle_types": r["vehicle_types"],
+            "time_ratio": time_ratio,
+            "mem_ratio": mem_ratio,
+            "regressed": bool(time_ratio > 1 + threshold or mem_ratio > 1 + threshold),
+        })
+    return pd.DataFrame(rows)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the EV demand pipeline at increasing scale")
+    parser.add_argument("--sizes", nargs="+", type=parse_size, default=[parse_size(s) for s in DEFAULT_SIZES],
+                        help="STATIONSxDAYS[xVEHICLE_TYPES] sizes to run")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--prophet-series", type=int, default=2,
+                        help="Series to fit with Prophet per size (0 to skip Prophet)")
+    parser.add_argument("--out", default="benchmark_results.json", help="Results JSON file")
+    parser.add_argument("--baseline", default=None, help="Results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown / memory growth vs the baseline (0.25 = 25%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args.sizes, args.only, args.repeats, args.prophet_series)
+    with open(args.out, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        comparison = compare(results, baseline, args.threshold)
+        if comparison.empty:
+            print("No benchmarks in common with the baseline.")
+            return 0
+        print(comparison.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+        if comparison["regressed"].any():
+            print(f"{int(comparison['regressed'].sum())} benchmark(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
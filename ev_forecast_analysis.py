@@ -1,55 +1,314 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
-from prophet import Prophet
-import matplotlib.pyplot as plt
 import numpy as np
 
-# Load the data
-df = pd.read_csv("ev_demand_data.csv")
-
-# Convert date and hour to datetime for Prophet
-df["ds"] = pd.to_datetime(df["date"], format="%d-%m-%Y") + pd.to_timedelta(df["hour"], unit="h")
-
-results = []
-peak_info = []
-
-for station_id, station_name in df.groupby(["station_id", "station_name"]).groups:
-    for vtype in ["car", "scooter"]:
-        station_df = df[(df["station_id"] == station_id) & (df["vehicle_type"] == vtype)]
-        # Group by ds (hourly)
-        ts = station_df.groupby("ds")["vehicles_charged"].sum().reset_index()
-        ts = ts.rename(columns={"ds": "ds", "vehicles_charged": "y"})
-        # Prophet forecast
-        m = Prophet()
-        m.fit(ts)
-        future = m.make_future_dataframe(periods=72, freq='H')
-        forecast = m.predict(future)
-        # Plot
-        plt.figure(figsize=(10,4))
-        m.plot(forecast, xlabel="Time", ylabel="Vehicles Charged")
-        plt.title(f"Forecast for {station_name} ({vtype})")
-        plt.tight_layout()
-        plt.savefig(f"forecast_{station_name}_{vtype}.png")
-        plt.close()
+from forecast_dataset import DATASET_COLUMNS, read_forecasts, write_forecasts
+from forecasters import FORECASTERS, get_forecaster
+from instrumentation import Tracer
+from model_store import ModelStore
+
+FORECAST_PERIODS = 72
+VEHICLE_TYPES = ["car", "scooter"]
+
+
+def load_data(path=None):
+    # Load the data: day-partitioned Parquet dataset if present, otherwise the CSV
+    if path is None:
+        path = "ev_demand_data" if os.path.isdir("ev_demand_data") else "ev_demand_data.csv"
+    if os.path.isdir(path):
+        from simulate_ev_data import read_ev_data
+        df = read_ev_data(path)
+    else:
+        df = pd.read_csv(path)
+    # Convert date and hour to datetime for Prophet
+    df["ds"] = pd.to_datetime(df["date"], format="%d-%m-%Y") + pd.to_timedelta(df["hour"], unit="h")
+    return df
+
+
+def build_tasks(df, periods=FORECAST_PERIODS, output_dir=".", plot=True, backend="prophet", model_store=None,
+                output_format="csv", forecast_dir=None):
+    # One small, picklable task per station x vehicle type so workers never see the full frame
+    tasks = []
+    for (station_id, station_name), station_df in df.groupby(["station_id", "station_name"]):
+        for vtype in VEHICLE_TYPES:
+            series_df = station_df[station_df["vehicle_type"] == vtype]
+            if series_df.empty:
+                continue
+            # Group by ds (hourly)
+            ts = series_df.groupby("ds")["vehicles_charged"].sum().reset_index()
+            ts = ts.rename(columns={"ds": "ds", "vehicles_charged": "y"})
+            tasks.append({
+                "station_id": station_id,
+                "station_name": station_name,
+                "vehicle_type": vtype,
+                "latitude": series_df["latitude"].iloc[0],
+                "longitude": series_df["longitude"].iloc[0],
+                "ts": ts,
+                "periods": periods,
+                "output_dir": output_dir,
+                "plot": plot,
+                "backend": backend,
+                "model_store": model_store,
+                "format": output_format,
+                "forecast_dir": forecast_dir,
+            })
+    return tasks
+
+
+def future_index(ds, periods):
+    # History timestamps followed by `periods` hours, like Prophet's make_future_dataframe
+    history = pd.DatetimeIndex(pd.unique(ds)).sort_values()
+    return history.append(pd.date_range(history[-1] + pd.Timedelta(hours=1), periods=periods, freq="h"))
+
+
+def forecast_all(tasks, backend):
+    # Vectorized backends forecast every series in one call; the result is split back onto the tasks
+    history = pd.concat(
+        [task["ts"].assign(_series=i) for i, task in enumerate(tasks)], ignore_index=True
+    )
+    future = future_index(history["ds"], tasks[0]["periods"])
+    forecast = get_forecaster(backend).forecast(history, future, keys=["_series"])
+    for i, f in forecast.groupby("_series", sort=True):
+        tasks[i]["forecast"] = f.drop(columns="_series").reset_index(drop=True)
+
+
+def output_path(task, ext):
+    return os.path.join(task["output_dir"], f"forecast_{task['station_name']}_{task['vehicle_type']}.{ext}")
+
+
+def render_plot(forecast, history, title, path):
+    # Same layout as Prophet's model.plot: history points, forecast line and interval band
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.plot(history["ds"], history["y"], "k.", label="Observed")
+    ax.plot(forecast["ds"], forecast["yhat"], ls="-", c="#0072B2", label="Forecast")
+    if "yhat_lower" in forecast.columns and "yhat_upper" in forecast.columns:
+        ax.fill_between(forecast["ds"], forecast["yhat_lower"], forecast["yhat_upper"], color="#0072B2", alpha=0.2)
+    ax.grid(True, which="major", c="gray", ls="-", lw=1, alpha=0.2)
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Vehicles Charged")
+    ax.set_title(title)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+def plot_title(task):
+    return f"Forecast for {task['station_name']} ({task['vehicle_type']})"
+
+
+def forecast_series(task):
+    # Fit, predict, optionally plot and save one series; returns its peak and stage timings.
+    # Tasks that already carry a forecast (vectorized backends) skip straight to saving.
+    timings = {"fit_s": 0.0, "predict_s": 0.0}
+    # Wall-clock start of each stage, so the parent can place the stages on its trace timeline
+    stage_starts = {"fit_at": time.time()}
+    start = time.perf_counter()
+    forecast = task.get("forecast")
+    if forecast is None and task["model_store"]:
+        # Only rows newer than the stored cutoff are folded into the persisted model
+        store = ModelStore(get_forecaster(task["backend"]), task["model_store"])
+        store.update(task["station_name"], task["vehicle_type"], task["ts"])
+        timings["fit_s"] = time.perf_counter() - start
+        stage_starts["predict_at"] = time.time()
+        t = time.perf_counter()
+        future = future_index(task["ts"]["ds"], task["periods"])
+        forecast = store.forecast(task["station_name"], task["vehicle_type"], future)
+        timings["predict_s"] = time.perf_counter() - t
+    elif forecast is None:
+        forecaster = get_forecaster(task["backend"])
+        future = future_index(task["ts"]["ds"], task["periods"])
+        if hasattr(forecaster, "fit"):
+            m = forecaster.fit(task["ts"])
+            timings["fit_s"] = time.perf_counter() - start
+            stage_starts["predict_at"] = time.time()
+            t = time.perf_counter()
+            forecast = m.predict(pd.DataFrame({"ds": future}))
+            timings["predict_s"] = time.perf_counter() - t
+        else:
+            forecast = forecaster.forecast(task["ts"], future, keys=())
+            timings["fit_s"] = time.perf_counter() - start
+
+    stage_starts["plot_at"] = time.time()
+    t = time.perf_counter()
+    if task["plot"]:
+        render_plot(forecast, task["ts"], plot_title(task), output_path(task, "png"))
+    timings["plot_s"] = time.perf_counter() - t
+
+    stage_starts["save_at"] = time.time()
+    t = time.perf_counter()
+    forecast["station_name"] = task["station_name"]
+    forecast["vehicle_type"] = task["vehicle_type"]
+    dataset_rows = None
+    if task.get("format") == "parquet":
+        # Only the dataset columns go back to the parent, which writes one dataset for all series
+        forecast["station_id"] = task["station_id"]
+        dataset_rows = forecast[[c for c in DATASET_COLUMNS if c in forecast.columns]]
+    else:
         # Save forecast to CSV for Streamlit app
-        forecast["station_name"] = station_name
-        forecast["vehicle_type"] = vtype
-        forecast["latitude"] = station_df["latitude"].iloc[0]
-        forecast["longitude"] = station_df["longitude"].iloc[0]
-        forecast.to_csv(f"forecast_{station_name}_{vtype}.csv", index=False)
-        # Find peak hour in forecast
-        peak_row = forecast.iloc[-72:]["yhat"].idxmax()
-        peak_time = forecast.iloc[peak_row]["ds"]
-        peak_value = forecast.iloc[peak_row]["yhat"]
-        peak_info.append({
-            "station_id": station_id,
-            "station_name": station_name,
-            "vehicle_type": vtype,
-            "peak_hour": peak_time,
-            "predicted_vehicles": peak_value
-        })
-
-# Find top 3 busiest stations (by max predicted vehicles in forecast)
-busy_df = pd.DataFrame(peak_info)
-top3 = busy_df.sort_values("predicted_vehicles", ascending=False).head(3)
-print("Top 3 busiest stations (predicted) and their peak hour:")
-print(top3[["station_name", "vehicle_type", "peak_hour", "predicted_vehicles"]])
+        forecast["latitude"] = task["latitude"]
+        forecast["longitude"] = task["longitude"]
+        forecast.to_csv(output_path(task, "csv"), index=False)
+    timings["save_s"] = time.perf_counter() - t
+    timings["total_s"] = time.perf_counter() - start
+
+    # Find peak hour in forecast
+    peak_row = forecast.iloc[-task["periods"]:]["yhat"].idxmax()
+    return {
+        "station_id": task["station_id"],
+        "station_name": task["station_name"],
+        "vehicle_type": task["vehicle_type"],
+        "peak_hour": forecast.iloc[peak_row]["ds"],
+        "predicted_vehicles": forecast.iloc[peak_row]["yhat"],
+        "pid": os.getpid(),
+        **timings,
+        **stage_starts,
+        **({"forecast": dataset_rows} if dataset_rows is not None else {}),
+    }
+
+
+def render_saved_plot(task):
+    # Deferred rendering: rebuild the chart from the saved forecast CSV or dataset
+    start = time.perf_counter()
+    if task.get("format") == "parquet":
+        forecast = read_forecasts(task["forecast_dir"], stations=[task["station_name"]],
+                                  vehicle_types=[task["vehicle_type"]])
+    else:
+        forecast = pd.read_csv(output_path(task, "csv"), parse_dates=["ds"])
+    render_plot(forecast, task["ts"], plot_title(task), output_path(task, "png"))
+    return time.perf_counter() - start
+
+
+def run_tasks(func, tasks, workers):
+    # Yields (task, result) as they complete, in-process when workers == 1
+    if workers <= 1:
+        for task in tasks:
+            yield task, func(task)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(func, task): task for task in tasks}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Batch forecasts for every station x vehicle type")
+    parser.add_argument("--input", default=None,
+                        help="ev_demand_data/ Parquet dataset or CSV file (default: whichever exists)")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (1 runs in-process)")
+    parser.add_argument("--backend", choices=sorted(FORECASTERS), default="prophet",
+                        help="Forecasting backend; 'seasonal' forecasts all series in one vectorized pass")
+    parser.add_argument("--model-store", default=None,
+                        help="Directory of persisted models; each run only folds in rows newer than the stored cutoff")
+    parser.add_argument("--periods", type=int, default=FORECAST_PERIODS, help="Forecast horizon in hours")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="One forecast CSV per series, or every series in one day-partitioned Parquet dataset")
+    parser.add_argument("--forecast-dir", default=None,
+                        help="Dataset directory for --format parquet (default: <output-dir>/forecasts)")
+    parser.add_argument("--plots", choices=["inline", "defer", "skip"], default=None,
+                        help="Render PNGs inside each fit, after all fits finish, or not at all "
+                             "(default: inline for csv, skip for parquet)")
+    parser.add_argument("--timings", default=None, help="Optional CSV path for per-series timings")
+    parser.add_argument("--trace", default=None, help="Optional JSON path for a stage/series timing trace")
+    parser.add_argument("--top", type=int, default=3)
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.plots is None:
+        args.plots = "skip" if args.format == "parquet" else "inline"
+    if args.forecast_dir is None:
+        args.forecast_dir = os.path.join(args.output_dir, "forecasts")
+    tracer = Tracer(enabled=bool(args.trace), name="ev_forecast_analysis")
+    os.makedirs(args.output_dir, exist_ok=True)
+    start = time.perf_counter()
+    with tracer.span("load_data"):
+        df = load_data(args.input)
+    with tracer.span("build_tasks"):
+        tasks = build_tasks(df, args.periods, args.output_dir, plot=args.plots == "inline",
+                            backend=args.backend, model_store=args.model_store,
+                            output_format=args.format, forecast_dir=args.forecast_dir)
+    load_s = time.perf_counter() - start
+    tracer.gauge("series", len(tasks))
+    if not tasks:
+        print(f"No station/vehicle series found in {args.input or 'the input data'}; nothing to forecast.")
+        return pd.DataFrame()
+
+    batch_s = 0.0
+    if tasks and get_forecaster(args.backend).vectorized and not args.model_store:
+        t = time.perf_counter()
+        with tracer.span("forecast_all", backend=args.backend):
+            forecast_all(tasks, args.backend)
+        tracer.count("vectorized_passes")
+        batch_s = time.perf_counter() - t
+        if not args.quiet:
+            print(f"{args.backend}: forecast {len(tasks)} series in one pass in {batch_s:.2f}s")
+
+    peak_info = []
+    dataset_frames = []
+    with tracer.span("forecast_series", workers=args.workers):
+        for task, result in run_tasks(forecast_series, tasks, args.workers):
+            if "forecast" in result:
+                dataset_frames.append(result.pop("forecast"))
+            peak_info.append(result)
+            # Workers time their own stages; they are recorded here as completed spans
+            # at the wall-clock time each stage started
+            for stage in ["fit", "predict", "plot", "save"]:
+                if result[f"{stage}_s"] > 0:
+                    tracer.record(f"series_{stage}", result[f"{stage}_s"], start=result.get(f"{stage}_at"),
+                                  station=result["station_name"], vehicle_type=result["vehicle_type"],
+                                  pid=result["pid"])
+            tracer.count("fits", int(result["fit_s"] > 0))
+            if not args.quiet:
+                print(f"{result['station_name']} ({result['vehicle_type']}): "
+                      f"fit {result['fit_s']:.2f}s, predict {result['predict_s']:.2f}s, "
+                      f"plot {result['plot_s']:.2f}s, total {result['total_s']:.2f}s")
+    if dataset_frames:
+        with tracer.span("write_forecasts"):
+            rows = write_forecasts(pd.concat(dataset_frames, ignore_index=True), args.forecast_dir)
+        if not args.quiet:
+            print(f"Wrote {rows} forecast rows for {len(dataset_frames)} series to {args.forecast_dir}")
+    fit_wall_s = time.perf_counter() - start - load_s
+
+    plot_wall_s = 0.0
+    if args.plots == "defer":
+        t = time.perf_counter()
+        plot_times = {}
+        with tracer.span("deferred_plots"):
+            for task, seconds in run_tasks(render_saved_plot, tasks, args.workers):
+                plot_times[(task["station_name"], task["vehicle_type"])] = seconds
+        for row in peak_info:
+            row["plot_s"] = plot_times[(row["station_name"], row["vehicle_type"])]
+        plot_wall_s = time.perf_counter() - t
+
+    busy_df = pd.DataFrame(peak_info)
+    if args.timings:
+        busy_df.drop(columns=["peak_hour", "predicted_vehicles"]).to_csv(args.timings, index=False)
+
+    # Find top busiest stations (by max predicted vehicles in forecast)
+    top = busy_df.sort_values("predicted_vehicles", ascending=False).head(args.top)
+    print(f"Top {args.top} busiest stations (predicted) and their peak hour:")
+    print(top[["station_name", "vehicle_type", "peak_hour", "predicted_vehicles"]])
+
+    cpu_s = busy_df["total_s"].sum() + batch_s if not busy_df.empty else 0.0
+    wall_s = time.perf_counter() - start
+    print(f"{len(tasks)} series with {args.workers} worker(s): load {load_s:.2f}s, "
+          f"fits {fit_wall_s:.2f}s (sum of series {cpu_s:.2f}s, speedup {cpu_s / max(fit_wall_s, 1e-9):.1f}x), "
+          f"deferred plots {plot_wall_s:.2f}s, total {wall_s:.2f}s")
+    if args.trace:
+        print(f"Trace written to {tracer.export(args.trace)}")
+    return busy_df
+
+
+if __name__ == "__main__":
+    main()
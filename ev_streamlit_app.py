@@ -1,62 +1,31 @@
-# Station capacity dictionary (car/scooter 20-30)
-station_capacity = {
-    "Connaught Place": {"car": 30, "scooter": 28},
-    "Nehru Place": {"car": 28, "scooter": 26},
-    "Rajouri Garden": {"car": 27, "scooter": 25},
-    "Saket": {"car": 29, "scooter": 27},
-    "Dwarka": {"car": 25, "scooter": 23},
-    "Karol Bagh": {"car": 26, "scooter": 24},
-    "Lajpat Nagar": {"car": 30, "scooter": 29},
-    "Vasant Kunj": {"car": 24, "scooter": 21},
-    "Preet Vihar": {"car": 22, "scooter": 20},
-    "Rohini": {"car": 20, "scooter": 20},
-}
-
-# Function to get overloaded stations
-def get_overloaded_stations(forecast_df, capacity_dict):
-    peak_df = (
-        forecast_df.groupby(['station_id', 'station_name', 'vehicle_type'], as_index=False)
-        .agg({'yhat': 'max'})
-        .rename(columns={'yhat': 'forecasted_peak'})
-    )
-    peak_df['capacity'] = peak_df.apply(
-        lambda row: capacity_dict.get(row['station_name'], {}).get(row['vehicle_type'], np.nan),
-        axis=1
-    )
-    peak_df['overload_pct'] = peak_df['forecasted_peak'] / peak_df['capacity']
-    peak_df['unmet_demand'] = peak_df['forecasted_peak'] - peak_df['capacity']
-    overloaded = peak_df[peak_df['overload_pct'] > 0.9]
-    message = ""
-    # Always show 3 stations: overloaded first, then next busiest
-    if overloaded.empty:
-        busiest = peak_df.sort_values('forecasted_peak', ascending=False).head(3)
-        busiest['recommendation'] = 'Monitor usage'
-        result = busiest
-        message = "No station exceeds 90% of its capacity. Showing top 3 busiest stations."
-    else:
-        overloaded = overloaded.copy()
-        overloaded['recommendation'] = overloaded['unmet_demand'].apply(
-            lambda x: f"Add {int(np.ceil(x/5))} more ports" if x > 0 else "Monitor usage"
-        )
-        # Get next busiest stations not overloaded
-        not_overloaded = peak_df[~peak_df.index.isin(overloaded.index)]
-        next_busiest = not_overloaded.sort_values('forecasted_peak', ascending=False).head(2)
-        next_busiest['recommendation'] = 'Monitor usage'
-        result = pd.concat([overloaded, next_busiest]).sort_values('forecasted_peak', ascending=False).head(3)
-        if (overloaded['forecasted_peak'] > overloaded['capacity']).any():
-            message = "Some stations exceed their maximum capacity! Immediate action required."
-        else:
-            message = "Some stations are above 90% capacity. Consider adding more ports."
-    return result[['station_id', 'vehicle_type', 'forecasted_peak', 'capacity', 'unmet_demand', 'recommendation']], message
+import functools
+import io
+import os
+import threading
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import plotly.express as px
-from prophet import Prophet
+from forecast_cache import ForecastCache
+from forecast_dataset import DEFAULT_FORECAST_DIR, PrecomputedForecaster, has_forecasts
+from forecasters import FORECAST_COLUMNS, SERIES_KEYS, get_forecaster
+from instrumentation import Tracer, debug_panel
+from model_store import ModelStore
+from overload_analysis import (
+    capacity_frame, evaluate_scenarios, get_overloaded_stations, overload_probability, scenario_grid, station_capacity,
+    summarize_scenarios,
+)
+from queue_sim import size_ports
+from series_store import SeriesStore
+from solar_suitability import RANK_METRICS, SolarSuitability
 
 st.title("EV Charging Demand Forecast Dashboard")
 
+# Stage timings for this rerun; a no-op unless the sidebar debug panel is on
+tracer = Tracer(enabled=st.session_state.get("debug_panel", False), name="dashboard")
+# Fragments record into it while this run is in progress; see traced_fragment
+st.session_state["run_tracer"] = tracer
+
 
 # Simulate and load data in-memory
 @st.cache_data
@@ -65,77 +34,242 @@ def load_ev_data():
     return simulate_ev_data()
 
 
-df = load_ev_data()
+# Timestamps parsed once and every station/type series indexed by time
+@st.cache_resource
+def load_series_store():
+    return SeriesStore(load_ev_data())
+
+
+with tracer.span("load_data"):
+    store = load_series_store()
 
 # Sidebar filters (use raw data for station/type selection)
-station = st.sidebar.selectbox("Select Station", df["station_name"].unique())
-vehicle_type = st.sidebar.selectbox("Select Vehicle Type", df["vehicle_type"].unique())
+station = st.sidebar.selectbox("Select Station", store.station_names)
+vehicle_type = st.sidebar.selectbox("Select Vehicle Type", store.vehicle_types)
 # Get available dates for selected station/type
-available_dates = pd.to_datetime(df[(df["station_name"] == station) & (df["vehicle_type"] == vehicle_type)]["date"], format="%d-%m-%Y").dt.date.unique()
+available_dates = store.available_dates(station, vehicle_type)
 date = st.sidebar.date_input("Select Date", value=min(available_dates) if len(available_dates) > 0 else None, min_value=min(available_dates) if len(available_dates) > 0 else None, max_value=max(available_dates) if len(available_dates) > 0 else None)
+# The seasonal profile backend forecasts every series in one array pass; Prophet fits each series
+forecast_backends = {"Fast (seasonal profile)": "seasonal", "Prophet": "prophet"}
+# Forecasts written by `ev_forecast_analysis.py --format parquet` are served without fitting
+forecast_dir = os.environ.get("EV_FORECAST_DIR", DEFAULT_FORECAST_DIR)
+if has_forecasts(forecast_dir):
+    forecast_backends = {"Precomputed (batch forecasts)": "precomputed", **forecast_backends}
+backend = st.sidebar.selectbox("Forecast Backend", list(forecast_backends))
+
+
+def make_forecaster(name):
+    return PrecomputedForecaster(forecast_dir) if name == "precomputed" else get_forecaster(name)
+
+
+forecaster = make_forecaster(forecast_backends[backend])
+st.sidebar.checkbox("Debug panel", key="debug_panel", help="Per-rerun stage timings, fit counts and cache hits")
+
+
+def training_window(selected_date):
+    # Previous 7 days up to the last hour before the selected date, and its 24 forecast hours
+    selected_date = pd.Timestamp(selected_date)
+    train_start = selected_date - pd.Timedelta(days=7)
+    train_end = selected_date - pd.Timedelta(days=1)
+    train_stop = selected_date - pd.Timedelta(hours=1)
+    forecast_hours = pd.date_range(selected_date, selected_date + pd.Timedelta(hours=23), freq="h")
+    return train_start, train_end, train_stop, forecast_hours
+
 
-# Filter for previous 7 days
 selected_date = pd.to_datetime(date)
-train_start = selected_date - pd.Timedelta(days=7)
-train_end = selected_date - pd.Timedelta(days=1)
-train_mask = (pd.to_datetime(df["date"], format="%d-%m-%Y") >= train_start) & (pd.to_datetime(df["date"], format="%d-%m-%Y") <= train_end)
-station_mask = (df["station_name"] == station) & (df["vehicle_type"] == vehicle_type)
-train_df = df[train_mask & station_mask]
+train_start, train_end, train_stop, forecast_hours = training_window(selected_date)
+train_df = store.window(station, vehicle_type, train_start, train_stop)
 
-if train_df.empty:
-    st.warning("Not enough historical data for selected station/type/date.")
-else:
-    # Prepare time series for Prophet
-    ts = train_df.groupby(["date", "hour", "latitude", "longitude"])["vehicles_charged"].sum().reset_index()
-    ts["ds"] = pd.to_datetime(ts["date"], format="%d-%m-%Y") + pd.to_timedelta(ts["hour"], unit="h")
-    ts = ts.rename(columns={"ds": "ds", "vehicles_charged": "y"})
-    m = Prophet()
-    m.fit(ts[["ds", "y"]])
-    # Forecast for selected date (24 hours)
-    forecast_hours = pd.date_range(selected_date, selected_date + pd.Timedelta(hours=23), freq="H")
-    future = pd.DataFrame({"ds": forecast_hours})
-    forecast = m.predict(future)
-    forecast["station_name"] = station
-    forecast["vehicle_type"] = vehicle_type
-    forecast["latitude"] = ts["latitude"].iloc[0] if len(ts) > 0 else None
-    forecast["longitude"] = ts["longitude"].iloc[0] if len(ts) > 0 else None
 
-    # Build a full forecast_df for all stations/types for overload analysis
-    all_forecast_rows = []
-    for s in df["station_name"].unique():
+# Forecasts are shared across reruns and sessions, so each series is fitted
+# at most once per training window
+@st.cache_resource
+def get_forecast_cache():
+    return ForecastCache(max_entries=512, max_bytes=64 * 1024 * 1024)
+
+
+forecast_cache = get_forecast_cache()
+cache_before = forecast_cache.stats()
+
+
+# Last fitted model per series, used to warm-start Prophet when the window moves
+@st.cache_resource
+def get_model_store(name):
+    return ModelStore(get_forecaster(name))
+
+
+model_store = None if forecaster.vectorized else get_model_store(forecaster.name)
+
+
+def forecast_key(fc, s, vtype, day):
+    start, end, _, _ = training_window(day)
+    return ForecastCache.make_key(s, vtype, start, end, model=fc.name, **fc.params())
+
+
+def forecast_all_series(fc, day, skip=None):
+    # One vectorized pass over every series in the window fills the cache for all of them
+    start, _, stop, hours = training_window(day)
+    all_forecasts = fc.forecast(store.history(start, stop), hours)
+    forecasts = {key: f.reset_index(drop=True) for key, f in all_forecasts.groupby(SERIES_KEYS)}
+    for s in store.station_names:
         for vtype in ["car", "scooter"]:
-            mask = (df["station_name"] == s) & (df["vehicle_type"] == vtype)
-            train = df[train_mask & mask]
-            if not train.empty:
-                ts = train.groupby(["date", "hour", "latitude", "longitude"])["vehicles_charged"].sum().reset_index()
-                ts["ds"] = pd.to_datetime(ts["date"], format="%d-%m-%Y") + pd.to_timedelta(ts["hour"], unit="h")
-                ts = ts.rename(columns={"ds": "ds", "vehicles_charged": "y"})
-                m = Prophet()
-                m.fit(ts[["ds", "y"]])
-                future = pd.DataFrame({"ds": forecast_hours})
-                f = m.predict(future)
-                for _, row in f.iterrows():
-                    all_forecast_rows.append({
-                        "station_id": df[df["station_name"] == s]["station_id"].iloc[0],
-                        "station_name": s,
-                        "vehicle_type": vtype,
-                        "ds": row["ds"],
-                        "yhat": row["yhat"]
-                    })
-    forecast_df = pd.DataFrame(all_forecast_rows)
-
-    st.subheader("🔺 Overload or High-Usage Station Suggestions (Car)")
-    car_df = forecast_df[forecast_df["vehicle_type"] == "car"]
-    car_suggestions, car_message = get_overloaded_stations(car_df, station_capacity)
-    st.dataframe(car_suggestions)
-    st.info(car_message)
-
-    st.subheader("🔺 Overload or High-Usage Station Suggestions (Scooter)")
-    scooter_df = forecast_df[forecast_df["vehicle_type"] == "scooter"]
-    scooter_suggestions, scooter_message = get_overloaded_stations(scooter_df, station_capacity)
-    st.dataframe(scooter_suggestions)
-    st.info(scooter_message)
-    st.subheader(f"Forecasted Demand for {station} ({vehicle_type}) on {date}")
+            if (s, vtype) != skip:
+                forecast_cache.put(forecast_key(fc, s, vtype, day), forecasts.get((s, vtype)))
+    return forecasts
+
+
+def fit_forecast(s, vtype):
+    tracer.count("forecast_fits")
+    if forecaster.vectorized:
+        with tracer.span("fit_all_series", backend=forecaster.name):
+            forecasts = forecast_all_series(forecaster, selected_date, skip=(s, vtype))
+        tracer.count("series_forecast", len(forecasts))
+        return forecasts.get((s, vtype))
+    ts = store.window(s, vtype, train_start, train_stop)
+    if ts.empty:
+        return None
+    previous = model_store.get(s, vtype)
+    init = forecaster.warm_start_params(previous["state"]["model"]) if previous else None
+    with tracer.span("fit", station=s, vehicle_type=vtype, warm_start=init is not None):
+        m = forecaster.fit(ts, init=init)
+    model_store.put(s, vtype, {"model": m}, ts["ds"].max())
+    tracer.count("series_forecast")
+    with tracer.span("predict", station=s, vehicle_type=vtype):
+        return m.predict(pd.DataFrame({"ds": forecast_hours}))
+
+
+def cached_forecast(s, vtype):
+    return forecast_cache.get_or_compute(forecast_key(forecaster, s, vtype, selected_date), lambda: fit_forecast(s, vtype))
+
+
+# Once per server process: fill the forecast cache for the default backend in a
+# background thread. The first day warmed is the first one with a full 7-day training
+# window (or the last day, if the history is shorter); the earliest day has no history
+# and is skipped, the others follow in order. It stops before a day would no longer
+# fit, so warming never evicts that first day. Only vectorized backends are warmed:
+# Prophet is never the default, and fitting every series with it here would compete
+# for CPU with the sessions in use for forecasts nobody may ask for. The chart and
+# map libraries are imported there too, off the first interaction.
+@st.cache_resource
+def start_precompute(name):
+    fc = make_forecaster(name)
+    all_days = sorted(pd.to_datetime(store.hourly["ds"]).dt.normalize().unique())
+    days = all_days[1:]
+    full_window = all_days[0] + pd.Timedelta(days=7)
+    first_day = next((day for day in days if day >= full_window), days[-1] if days else None)
+    days = [first_day] + [day for day in days if day != first_day] if days else []
+    per_day = 2 * len(store.station_names)
+
+    def run():
+        if fc.vectorized:
+            for day in days:
+                if forecast_key(fc, store.station_names[0], "car", day) in forecast_cache:
+                    continue
+                if len(forecast_cache) + per_day > forecast_cache.max_entries or \
+                        forecast_cache.nbytes > forecast_cache.max_bytes // 2:
+                    break
+                forecast_all_series(fc, day)
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot  # noqa: F401
+        import plotly.express  # noqa: F401
+
+    thread = threading.Thread(target=run, name="forecast-precompute", daemon=True)
+    thread.start()
+    return thread
+
+
+start_precompute(next(iter(forecast_backends.values())))
+
+
+def traced_fragment(func):
+    # st.fragment that hands its body the tracer of the run it executes in: the script
+    # run's tracer on a full rerun, or a fresh one with its own debug panel when only
+    # the fragment reruns (the module-level tracer then belongs to an earlier run)
+    @st.fragment
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        run_tracer = st.session_state.get("run_tracer")
+        if run_tracer is not None:
+            return func(run_tracer, *args, **kwargs)
+        fragment_tracer = Tracer(enabled=st.session_state.get("debug_panel", False), name=f"dashboard-{func.__name__}")
+        result = func(fragment_tracer, *args, **kwargs)
+        debug_panel(fragment_tracer, f"Debug: {func.__name__} rerun")
+        return result
+    return wrapper
+
+
+# Each section below is a fragment whose expensive part is cached on its own inputs,
+# so widgets inside a section rerun only that section and a sidebar change only
+# recomputes the sections whose inputs changed. matplotlib and plotly are imported
+# on first use.
+@st.cache_data(show_spinner=False)
+def overload_tables(forecast_df):
+    return {
+        vtype: get_overloaded_stations(forecast_df[forecast_df["vehicle_type"] == vtype], station_capacity)
+        for vtype in ["car", "scooter"]
+    }
+
+
+@traced_fragment
+def overload_section(tracer, forecast_df):
+    with tracer.span("overload_tables"):
+        tables = overload_tables(forecast_df)
+    for vtype, label in [("car", "Car"), ("scooter", "Scooter")]:
+        suggestions, message = tables[vtype]
+        st.subheader(f"🔺 Overload or High-Usage Station Suggestions ({label})")
+        st.dataframe(suggestions)
+        st.info(message)
+
+
+@st.cache_data(show_spinner=False)
+def overload_risk(forecast_df, target_risk, method):
+    return overload_probability(forecast_df, station_capacity, n_draws=2000, method=method,
+                                target_risk=target_risk, seed=0)
+
+
+@traced_fragment
+def overload_risk_section(tracer, forecast_df, station, vehicle_type):
+    # Thousands of simulated demand days per series instead of the single forecast peak
+    st.subheader("Overload Risk (Monte Carlo)")
+    col_risk, col_method = st.columns(2)
+    target_risk = col_risk.slider("Target risk of exceeding capacity", 0.01, 0.5, 0.05)
+    methods = {"Forecast interval": "interval", "Poisson arrivals": "poisson"}
+    if forecast_df["yhat_lower"].isna().any():
+        methods.pop("Forecast interval")
+    method = col_method.radio("Demand draws", list(methods), horizontal=True)
+    with tracer.span("overload_risk", method=methods[method]):
+        hourly, summary = overload_risk(forecast_df, target_risk, methods[method])
+    st.dataframe(summary.sort_values("peak_exceed_prob", ascending=False)[[
+        "station_name", "vehicle_type", "capacity", "forecasted_peak", "peak_exceed_prob",
+        "max_hour_exceed_prob", "expected_unmet_demand", "peak_at_target_risk", "ports_needed",
+    ]], hide_index=True)
+    selected = hourly[(hourly["station_name"] == station) & (hourly["vehicle_type"] == vehicle_type)]
+    st.caption(f"Hourly probability that {station} ({vehicle_type}) demand exceeds capacity")
+    st.line_chart(selected.set_index("ds")[["exceed_prob"]])
+
+
+@st.cache_data(show_spinner=False)
+def port_sizing(demand_df, target_wait):
+    sizing = size_ports(demand_df, target_wait, demand_col="yhat", runs=20, seed=0)
+    return sizing.merge(capacity_frame(station_capacity), on=["station_name", "vehicle_type"], how="left")
+
+
+@traced_fragment
+def port_sizing_section(tracer, forecast_df, vehicle_type):
+    # Queue simulation: arrivals at the forecast hourly rates, ports sized for a p95 wait target
+    st.subheader(f"Queue-Based Port Sizing ({vehicle_type})")
+    target_wait = st.number_input("Target p95 wait (min)", min_value=1, value=10, step=1)
+    with tracer.span("port_sizing"):
+        sizing = port_sizing(forecast_df[forecast_df["vehicle_type"] == vehicle_type], target_wait)
+    st.dataframe(sizing.sort_values("ports_needed", ascending=False))
+
+
+@st.cache_data(show_spinner=False)
+def forecast_chart_png(forecast, station, vehicle_type):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots(figsize=(10, 5))
     ax.plot(forecast["ds"], forecast["yhat"], marker='o', color='tab:blue', label='Predicted Demand')
     if "yhat_lower" in forecast.columns and "yhat_upper" in forecast.columns:
@@ -144,36 +278,159 @@ else:
     ax.set_ylabel("Predicted Vehicles Charged")
     ax.set_title(f"Predicted EV Charging Demand for {station} ({vehicle_type})")
     ax.legend()
-    st.pyplot(fig)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=200)
+    plt.close(fig)
+    return buf.getvalue()
 
-    # Map: show all stations. Selected station shows forecast, others show historical max for selected type
-    map_df = df[df["vehicle_type"] == vehicle_type].groupby(["station_name", "latitude", "longitude"])["vehicles_charged"].max().reset_index()
-    # Add forecasted demand for selected station
-    map_df["forecasted_demand"] = map_df["yhat"] if "yhat" in map_df.columns else map_df["vehicles_charged"]
-    selected_max = forecast["yhat"].max()
+
+@traced_fragment
+def chart_section(tracer, forecast, station, vehicle_type, date):
+    st.subheader(f"Forecasted Demand for {station} ({vehicle_type}) on {date}")
+    with tracer.span("forecast_chart"):
+        png = forecast_chart_png(forecast[[c for c in FORECAST_COLUMNS if c in forecast.columns]], station, vehicle_type)
+    st.image(png)
+
+
+@st.cache_data(show_spinner=False)
+def station_map_figure(vehicle_type, station, selected_max):
+    # All stations: the selected one shows its forecast peak, the others their historical max
+    import plotly.express as px
+    map_df = pd.DataFrame([
+        {"station_name": s, "latitude": store.station_meta(s)["latitude"], "longitude": store.station_meta(s)["longitude"],
+         "vehicles_charged": float(store.series[(s, vehicle_type)].max())}
+        for s in store.station_names if (s, vehicle_type) in store
+    ])
+    map_df["forecasted_demand"] = map_df["vehicles_charged"]
     map_df.loc[map_df["station_name"] == station, "forecasted_demand"] = selected_max
     fig_map = px.scatter_mapbox(map_df, lat="latitude", lon="longitude", color="forecasted_demand",
                                hover_name="station_name", size="forecasted_demand",
                                color_continuous_scale="Viridis", zoom=10, height=400)
     fig_map.update_layout(mapbox_style="open-street-map")
+    return fig_map
+
+
+@traced_fragment
+def map_section(tracer, vehicle_type, station, selected_max):
+    with tracer.span("station_map"):
+        fig_map = station_map_figure(vehicle_type, station, float(selected_max))
     st.subheader("Station Map (All stations, marker color = forecasted or historical demand)")
     st.plotly_chart(fig_map)
 
-    # Top 5 stations by predicted usage (for selected date/type)
-    # For demo, use all stations for selected type and date
-    top_df = []
-    for s in df["station_name"].unique():
-        mask = (df["station_name"] == s) & (df["vehicle_type"] == vehicle_type)
-        train = df[train_mask & mask]
-        if not train.empty:
-            ts = train.groupby(["date", "hour", "latitude", "longitude"])["vehicles_charged"].sum().reset_index()
-            ts["ds"] = pd.to_datetime(ts["date"], format="%d-%m-%Y") + pd.to_timedelta(ts["hour"], unit="h")
-            ts = ts.rename(columns={"ds": "ds", "vehicles_charged": "y"})
-            m = Prophet()
-            m.fit(ts[["ds", "y"]])
-            future = pd.DataFrame({"ds": forecast_hours})
-            f = m.predict(future)
-            top_df.append({"station_name": s, "yhat": f["yhat"].max()})
-    top5 = pd.DataFrame(top_df).sort_values("yhat", ascending=False).head(5)
+
+@st.cache_data(show_spinner=False)
+def top_stations(forecast_df, vehicle_type, n=5):
+    peaks = forecast_df[forecast_df["vehicle_type"] == vehicle_type].groupby("station_name", sort=False)["yhat"].max()
+    return peaks.sort_values(ascending=False).head(n).reset_index()
+
+
+@traced_fragment
+def top5_section(tracer, forecast_df, vehicle_type):
+    # Top 5 stations by predicted usage for the selected date and type
+    with tracer.span("top5"):
+        top5 = top_stations(forecast_df, vehicle_type)
     st.subheader("Top 5 Stations by Predicted Usage")
     st.table(top5[["station_name", "yhat"]])
+
+
+# Daytime demand folded in day by day; appending a day updates every station in O(stations)
+@st.cache_resource
+def get_solar_engine():
+    engine = SolarSuitability(window_days=7)
+    engine.update(load_ev_data())
+    return engine
+
+
+@traced_fragment
+def solar_section(tracer):
+    st.subheader("Solar Suitability")
+    engine = get_solar_engine()
+    col_n, col_by = st.columns(2)
+    n = col_n.slider("Stations", 1, max(len(engine), 2), min(5, max(len(engine), 1)))
+    by = col_by.selectbox("Rank by", RANK_METRICS, help="window_mean: average daytime (09:00-17:00) demand per day")
+    with tracer.span("solar_top"):
+        top = engine.top(n, by)
+    st.caption(f"Daytime demand over the last {min(engine.days, engine.window_days)} of {engine.days} days")
+    st.table(top.round(2))
+
+
+@st.cache_data(show_spinner=False)
+def scenario_sweep(forecast_df, max_extra_ports, multiplier_range, session_range, steps):
+    scenarios = scenario_grid(
+        range(max_extra_ports + 1),
+        np.linspace(*multiplier_range, steps),
+        np.linspace(*session_range, steps),
+    )
+    sweep = evaluate_scenarios(forecast_df, station_capacity, scenarios)
+    return scenarios, sweep, summarize_scenarios(sweep)
+
+
+@traced_fragment
+def what_if_section(tracer, forecast_df, station, vehicle_type):
+    # What-If: every station x vehicle type x scenario in one vectorized sweep
+    st.subheader("What-If Scenario Sweep")
+    col_ports, col_mult, col_session = st.columns(3)
+    max_extra_ports = col_ports.slider("Extra ports (up to)", 0, 20, 10)
+    multiplier_range = col_mult.slider("Demand multiplier", 0.5, 3.0, (0.8, 1.5))
+    session_range = col_session.slider("Session time (min)", 10, 120, (20, 60))
+    steps = st.slider("Steps per range", 2, 50, 10)
+    with tracer.span("what_if_sweep"):
+        scenarios, sweep, summary = scenario_sweep(forecast_df, max_extra_ports, multiplier_range, session_range, steps)
+    st.caption(f"{len(scenarios)} scenarios evaluated for {len(sweep) // max(len(scenarios), 1)} station/vehicle series")
+    st.dataframe(summary.sort_values(["overloaded_series", "recommended_ports"], ascending=False).head(20))
+    selected_sweep = sweep[(sweep["station_name"] == station) & (sweep["vehicle_type"] == vehicle_type)]
+    st.dataframe(selected_sweep.sort_values("overload_pct", ascending=False).head(20)[[
+        "extra_ports", "demand_multiplier", "session_minutes", "demand", "effective_capacity",
+        "overload_pct", "unmet_demand", "recommended_ports",
+    ]])
+
+
+def assemble_forecast_df():
+    all_forecast_frames = []
+    for s in store.station_names:
+        for vtype in ["car", "scooter"]:
+            f = cached_forecast(s, vtype)
+            if f is not None:
+                all_forecast_frames.append(pd.DataFrame({
+                    "station_id": store.station_id(s),
+                    "station_name": s,
+                    "vehicle_type": vtype,
+                    "ds": f["ds"].to_numpy(),
+                    "yhat": f["yhat"].to_numpy(),
+                    "yhat_lower": f["yhat_lower"].to_numpy() if "yhat_lower" in f.columns else np.nan,
+                    "yhat_upper": f["yhat_upper"].to_numpy() if "yhat_upper" in f.columns else np.nan,
+                }))
+    return pd.concat(all_forecast_frames, ignore_index=True)
+
+
+with tracer.span("forecast_selected"):
+    selected_forecast = None if train_df.empty else cached_forecast(station, vehicle_type)
+
+if train_df.empty:
+    st.warning("Not enough historical data for selected station/type/date.")
+elif selected_forecast is None:
+    st.warning(f"No forecast for {station} ({vehicle_type}) on {date} in {forecast_dir}. "
+               "Rerun ev_forecast_analysis.py --format parquet or pick another backend.")
+else:
+    # Build a full forecast_df for all stations/types for overload analysis
+    with tracer.span("assemble_forecast_df"):
+        forecast_df = forecast_cache.get_or_compute(
+            forecast_key(forecaster, "*", "*", selected_date), assemble_forecast_df
+        )
+
+    overload_section(forecast_df)
+    overload_risk_section(forecast_df, station, vehicle_type)
+    port_sizing_section(forecast_df, vehicle_type)
+    chart_section(selected_forecast, station, vehicle_type, date)
+    map_section(vehicle_type, station, selected_forecast["yhat"].max())
+    top5_section(forecast_df, vehicle_type)
+    what_if_section(forecast_df, station, vehicle_type)
+
+solar_section()
+
+cache_after = forecast_cache.stats()
+for stat in ["hits", "misses", "evictions"]:
+    tracer.gauge(f"forecast_cache_{stat}", cache_after[stat] - cache_before[stat])
+tracer.gauge("forecast_cache_entries", cache_after["entries"])
+debug_panel(tracer, "Debug: stage timings for this rerun")
+st.session_state["run_tracer"] = None
@@ -0,0 +1,175 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from recommender import StationIndex, haversine_np, queue_minutes, travel_minutes
+
+VEHICLE_TYPES = ["car", "scooter"]
+# Queue slots first offered per port at stations without a queue limit in the optimal
+# assignment, instead of one per vehicle; doubled where a solution fills them
+OPTIMAL_SLOTS_PER_PORT = 4
+# Above this many cost-matrix cells a vehicle type falls back to the greedy assignment
+OPTIMAL_MAX_CELLS = 20_000_000
+
+
+def _as_index(stations):
+    return stations if isinstance(stations, StationIndex) else StationIndex(stations)
+
+
+def _vehicle_codes(vehicle_type, n):
+    vehicle_type = np.broadcast_to(np.asarray(vehicle_type, dtype=object), (n,))
+    codes = np.full(n, -1, dtype=np.int64)
+    for code, name in enumerate(VEHICLE_TYPES):
+        codes[vehicle_type == name] = code
+    if (codes < 0).any():
+        raise ValueError(f"vehicle_type must be one of {VEHICLE_TYPES}")
+    return codes
+
+
+def _station_state(index):
+    # (n_types, n_stations) arrays of ports, waiting and session minutes
+    ports, waiting, session = (np.stack([index.state[t][i] for t in VEHICLE_TYPES]) for i in range(3))
+    return ports, waiting.copy(), session
+
+
+def eta_matrix(stations, vehicle_lat, vehicle_lon, vehicle_type):
+    # vehicles x stations distance, travel, queue and total ETA in one NumPy pass.
+    # stations is a StationIndex or the station dicts from simulate_station_data.
+    index = _as_index(stations)
+    vehicle_lat = np.asarray(vehicle_lat, dtype=float)
+    vehicle_lon = np.asarray(vehicle_lon, dtype=float)
+    codes = _vehicle_codes(vehicle_type, len(vehicle_lat))
+    ports, waiting, session = _station_state(index)
+
+    distance = haversine_np(vehicle_lat[:, None], vehicle_lon[:, None], index.lat[None, :], index.lon[None, :])
+    travel = travel_minutes(distance, index.traffic_speed[None, :])
+    queue = queue_minutes(ports, waiting, session)[codes]
+    return {"distance_km": distance, "travel_time": travel, "queue_time": queue, "total_eta": travel + queue}
+
+
+def assign_vehicles(stations, vehicle_lat, vehicle_lon, vehicle_type, max_queue_per_port=None, method="greedy"):
+    # Spreads a fleet over stations instead of sending everyone to the single best one.
+    # Every vehicle placed at a station joins its queue, adding session / ports minutes
+    # for the next vehicle of that type. max_queue_per_port caps waiting vehicles at
+    # ports * max_queue_per_port; vehicles that fit nowhere get station -1.
+    #   greedy:  vehicles in order of their best ETA each take the station with the lowest
+    #            current total ETA, then that station's queue is updated (O(V x S)).
+    #   optimal: min-cost assignment over per-port queue slots (needs scipy). Stations
+    #            without a queue limit start with ports * OPTIMAL_SLOTS_PER_PORT slots;
+    #            any such station the solution fills gets twice as many and the problem is
+    #            solved again, so the result is exact. Vehicle types whose cost matrix
+    #            would exceed OPTIMAL_MAX_CELLS fall back to greedy with a RuntimeWarning.
+    # The method column says which of the two placed each vehicle.
+    index = _as_index(stations)
+    vehicle_lat = np.asarray(vehicle_lat, dtype=float)
+    vehicle_lon = np.asarray(vehicle_lon, dtype=float)
+    n_vehicles = len(vehicle_lat)
+    codes = _vehicle_codes(vehicle_type, n_vehicles)
+    etas = eta_matrix(index, vehicle_lat, vehicle_lon, np.asarray(VEHICLE_TYPES, dtype=object)[codes])
+    travel = etas["travel_time"]
+    ports, waiting, session = _station_state(index)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        step = np.where(ports > 0, session / ports, np.inf)
+    if max_queue_per_port is None:
+        limit = np.where(ports > 0, np.inf, 0)
+    else:
+        limit = np.floor(ports * max_queue_per_port)
+
+    if method == "greedy":
+        station, queue = _assign_greedy(travel, codes, waiting, step, limit, etas["total_eta"])
+        used = np.full(n_vehicles, "greedy", dtype=object)
+    elif method == "optimal":
+        station, queue, used = _assign_optimal(travel, codes, ports, waiting, step, limit, etas["total_eta"])
+    else:
+        raise ValueError(f"method must be 'greedy' or 'optimal', got {method!r}")
+
+    assigned = station >= 0
+    rows = np.arange(n_vehicles)
+    travel_time = np.where(assigned, travel[rows, np.maximum(station, 0)], np.nan)
+    distance = np.where(assigned, etas["distance_km"][rows, np.maximum(station, 0)], np.nan)
+    names = np.array([s["name"] for s in index.station_data], dtype=object)
+    return pd.DataFrame({
+        "vehicle": rows,
+        "vehicle_type": np.asarray(VEHICLE_TYPES, dtype=object)[codes],
+        "station_index": station,
+        "station": np.where(assigned, names[np.maximum(station, 0)], None),
+        "distance_km": distance,
+        "travel_time": travel_time,
+        "queue_time": queue,
+        "total_eta": travel_time + queue,
+        "method": used,
+    })
+
+
+def _assign_greedy(travel, codes, waiting, step, limit, initial_eta):
+    n_vehicles = travel.shape[0]
+    station = np.full(n_vehicles, -1, dtype=np.int64)
+    queue = np.full(n_vehicles, np.nan)
+    # Current queue minutes per type x station, kept in sync as vehicles are placed
+    with np.errstate(invalid="ignore"):
+        current = np.where(np.isfinite(step), waiting * step, 0.0)
+    order = np.argsort(initial_eta.min(axis=1), kind="stable")
+    for v in order:
+        t = codes[v]
+        cost = np.where(waiting[t] < limit[t], travel[v] + current[t], np.inf)
+        s = int(np.argmin(cost))
+        if not np.isfinite(cost[s]):
+            continue
+        station[v] = s
+        queue[v] = current[t, s]
+        waiting[t, s] += 1
+        current[t, s] += step[t, s]
+    return station, queue
+
+
+def _slot_counts(ports, waiting, limit, n_vehicles):
+    # Free queue slots per station, never more than n_vehicles; stations without a limit
+    # start with OPTIMAL_SLOTS_PER_PORT per port, doubled until the slots cover every vehicle
+    free = np.maximum(limit - waiting, 0)
+    open_ended = ~np.isfinite(free)
+    per_port = OPTIMAL_SLOTS_PER_PORT
+    while True:
+        slots = np.minimum(np.where(open_ended, np.ceil(ports * per_port), free), n_vehicles).astype(np.int64)
+        if slots.sum() >= n_vehicles or not open_ended.any() or per_port >= n_vehicles:
+            return slots, open_ended
+        per_port *= 2
+
+
+def _assign_optimal(travel, codes, ports, waiting, step, limit, initial_eta):
+    from scipy.optimize import linear_sum_assignment
+    n_vehicles, n_stations = travel.shape
+    station = np.full(n_vehicles, -1, dtype=np.int64)
+    queue = np.full(n_vehicles, np.nan)
+    used = np.full(n_vehicles, "optimal", dtype=object)
+    for t in range(len(VEHICLE_TYPES)):
+        vehicles = np.flatnonzero(codes == t)
+        if len(vehicles) == 0:
+            continue
+        free, open_ended = _slot_counts(ports[t], waiting[t], limit[t], len(vehicles))
+        while True:
+            if len(vehicles) * free.sum() > OPTIMAL_MAX_CELLS:
+                warnings.warn(f"{len(vehicles)} {VEHICLE_TYPES[t]}s x {free.sum()} queue slots exceeds "
+                              f"OPTIMAL_MAX_CELLS; using the greedy assignment for them", RuntimeWarning)
+                station[vehicles], queue[vehicles] = _assign_greedy(
+                    travel[vehicles], codes[vehicles], waiting, step, limit, initial_eta[vehicles])
+                used[vehicles] = "greedy"
+                break
+            # One column per free queue slot; slot j at a station waits (waiting + j) * step
+            slot_station = np.repeat(np.arange(n_stations), free)
+            if len(slot_station) == 0:
+                break
+            slot_rank = np.arange(len(slot_station)) - np.repeat(np.cumsum(free) - free, free)
+            slot_queue = (waiting[t, slot_station] + slot_rank) * step[t, slot_station]
+            cost = travel[np.ix_(vehicles, slot_station)] + slot_queue[None, :]
+            rows, cols = linear_sum_assignment(cost)
+            # Slot costs only rise with rank, so the solution is exact unless it used every
+            # slot of a station that could offer more
+            full = open_ended & (np.bincount(slot_station[cols], minlength=n_stations) >= free) & \
+                (free < len(vehicles))
+            if not full.any():
+                station[vehicles[rows]] = slot_station[cols]
+                queue[vehicles[rows]] = slot_queue[cols]
+                break
+            free[full] = np.minimum(2 * free[full], len(vehicles))
+    return station, queue, used
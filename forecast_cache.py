@@ -0,0 +1,99 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def _nbytes(value):
+    # Approximate in-memory size of a cached forecast
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    return 0
+
+
+class ForecastCache:
+    # LRU cache of fitted forecasts keyed by (station, vehicle_type, training window, model params).
+    # Bounded both by entry count and by total bytes; safe to share between Streamlit sessions.
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.RLock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(station, vehicle_type, train_start, train_end, **params):
+        return (
+            station,
+            vehicle_type,
+            pd.Timestamp(train_start),
+            pd.Timestamp(train_end),
+            tuple(sorted(params.items())),
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._sizes.pop(key)
+                del self._entries[key]
+            size = _nbytes(value)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.nbytes += size
+            self._evict()
+
+    def get_or_compute(self, key, compute):
+        # Returns the cached forecast, or computes and stores it on a miss
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _evict(self):
+        # Drop least recently used entries until both bounds hold (always keep the newest one)
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self.nbytes > self.max_bytes):
+            key, _ = self._entries.popitem(last=False)
+            self.nbytes -= self._sizes.pop(key)
+            self.evictions += 1
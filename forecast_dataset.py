@@ -0,0 +1,93 @@
+import os
+
+import pandas as pd
+
+from forecasters import FORECAST_COLUMNS, SERIES_KEYS, Forecaster
+
+DEFAULT_FORECAST_DIR = "forecasts"
+# Everything the dashboard and overload analysis need; Prophet's component columns are dropped
+KEY_COLUMNS = ["station_id", "station_name", "vehicle_type"]
+DATASET_COLUMNS = KEY_COLUMNS + FORECAST_COLUMNS
+
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive")
+
+
+def has_forecasts(root=DEFAULT_FORECAST_DIR):
+    return os.path.isdir(root) and any(name.startswith("day=") for name in os.listdir(root))
+
+
+def dataset_version(root=DEFAULT_FORECAST_DIR):
+    # Latest modification time of any day partition; 0 when there is no dataset
+    if not has_forecasts(root):
+        return 0
+    return max(os.path.getmtime(os.path.join(root, name)) for name in os.listdir(root) if name.startswith("day="))
+
+
+def write_forecasts(forecasts, root=DEFAULT_FORECAST_DIR):
+    # One Parquet dataset for every series, partitioned by forecast day under
+    # root/day=YYYY-MM-DD/. Days present in `forecasts` replace what was stored for them.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    frame = forecasts[[c for c in DATASET_COLUMNS if c in forecasts.columns]].copy()
+    frame["ds"] = pd.to_datetime(frame["ds"])
+    for col in ["yhat", "yhat_lower", "yhat_upper"]:
+        if col in frame.columns:
+            frame[col] = frame[col].astype("float32")
+    frame = frame.sort_values(["ds"] + [c for c in KEY_COLUMNS if c in frame.columns], kind="stable")
+    frame["day"] = frame["ds"].dt.strftime("%Y-%m-%d")
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    pq.write_to_dataset(table, root, partitioning=_partitioning(),
+                        basename_template="part-{i}.parquet", existing_data_behavior="delete_matching")
+    return len(frame)
+
+
+def read_forecasts(root=DEFAULT_FORECAST_DIR, start=None, end=None, stations=None, vehicle_types=None, columns=None):
+    # Forecasts with start <= ds <= end, reading only the day partitions that overlap it
+    import pyarrow.parquet as pq
+    filters = []
+    if start is not None:
+        filters.append(("day", ">=", pd.Timestamp(start).strftime("%Y-%m-%d")))
+    if end is not None:
+        filters.append(("day", "<=", pd.Timestamp(end).strftime("%Y-%m-%d")))
+    if stations is not None:
+        filters.append(("station_name", "in", list(stations)))
+    if vehicle_types is not None:
+        filters.append(("vehicle_type", "in", list(vehicle_types)))
+    table = pq.read_table(root, columns=columns, filters=filters or None,
+                          partitioning=_partitioning(), memory_map=True)
+    df = table.to_pandas().drop(columns=["day"], errors="ignore")
+    if "ds" in df.columns:
+        if start is not None:
+            df = df[df["ds"] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df["ds"] <= pd.Timestamp(end)]
+    sort_cols = [c for c in SERIES_KEYS + ["ds"] if c in df.columns]
+    return df.sort_values(sort_cols, kind="stable").reset_index(drop=True)
+
+
+class PrecomputedForecaster(Forecaster):
+    # Serves forecasts written by `ev_forecast_analysis.py --format parquet` instead
+    # of fitting; the history argument is ignored. Series or hours missing from the
+    # dataset are simply absent from the result.
+    name = "precomputed"
+    vectorized = True
+
+    def __init__(self, root=DEFAULT_FORECAST_DIR, interval_width=0.8):
+        super().__init__(interval_width)
+        self.root = root
+
+    def params(self):
+        # The version changes whenever a partition is rewritten, so cached forecasts go stale with it
+        return {"root": os.path.abspath(self.root), "version": dataset_version(self.root)}
+
+    def forecast(self, history, future, keys=SERIES_KEYS):
+        keys = list(keys)
+        future = pd.DatetimeIndex(future)
+        if len(future) == 0 or not has_forecasts(self.root):
+            return pd.DataFrame(columns=keys + FORECAST_COLUMNS)
+        df = read_forecasts(self.root, future.min(), future.max(), columns=keys + FORECAST_COLUMNS)
+        return df[df["ds"].isin(future)].reset_index(drop=True)
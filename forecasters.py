@@ -0,0 +1,275 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+SERIES_KEYS = ["station_name", "vehicle_type"]
+FORECAST_COLUMNS = ["ds", "yhat", "yhat_lower", "yhat_upper"]
+
+
+class Forecaster:
+    # Common interface for forecasting backends.
+    # forecast(history, future, keys) takes a long frame with the key columns, "ds" and "y",
+    # and returns one row per series x future timestamp with the key columns,
+    # ds, yhat, yhat_lower and yhat_upper. With keys=() the whole history is one series.
+    name = None
+    # True when the backend forecasts every series in one call rather than one at a time
+    vectorized = False
+
+    def __init__(self, interval_width=0.8):
+        self.interval_width = interval_width
+
+    def params(self):
+        return {"interval_width": self.interval_width}
+
+    def forecast(self, history, future, keys=SERIES_KEYS):
+        raise NotImplementedError
+
+    # Incremental protocol used by ModelStore: a JSON-serialisable state per series
+    # that can absorb new rows without refitting on the full history.
+    def update_state(self, state, new_rows):
+        raise NotImplementedError
+
+    def predict_state(self, state, future, start=None, end=None):
+        raise NotImplementedError
+
+    def state_to_json(self, state):
+        return state
+
+    def state_from_json(self, obj):
+        return obj
+
+
+class ProphetForecaster(Forecaster):
+    # Fits one Prophet model per series; keeps all of Prophet's output columns
+    name = "prophet"
+
+    def __init__(self, interval_width=0.8, **prophet_kwargs):
+        super().__init__(interval_width)
+        self.prophet_kwargs = prophet_kwargs
+
+    def params(self):
+        return {**super().params(), **self.prophet_kwargs}
+
+    def fit(self, ts, init=None):
+        # init: parameters of a previous fit to warm-start the optimiser from
+        from prophet import Prophet
+        if init is not None:
+            try:
+                m = Prophet(interval_width=self.interval_width, **self.prophet_kwargs)
+                return m.fit(ts[["ds", "y"]], init=init)
+            except (ValueError, RuntimeError):
+                # Parameter shapes change when the history enables new seasonalities
+                # or changepoints; fall back to a cold fit
+                pass
+        m = Prophet(interval_width=self.interval_width, **self.prophet_kwargs)
+        m.fit(ts[["ds", "y"]])
+        return m
+
+    @staticmethod
+    def warm_start_params(m):
+        # Point estimates of a fitted model in the form Prophet.fit(init=...) expects
+        params = {name: float(m.params[name][0][0]) for name in ["k", "m", "sigma_obs"]}
+        for name in ["delta", "beta"]:
+            params[name] = m.params[name][0]
+        return params
+
+    def update_state(self, state, new_rows):
+        # Warm-started refit on the stored history plus the new rows
+        if state is None:
+            return {"model": self.fit(new_rows)}
+        old = state["model"]
+        history = pd.concat([old.history[["ds", "y"]], new_rows[["ds", "y"]]], ignore_index=True)
+        return {"model": self.fit(history, init=self.warm_start_params(old))}
+
+    def predict_state(self, state, future, start=None, end=None):
+        return state["model"].predict(pd.DataFrame({"ds": pd.DatetimeIndex(future)}))
+
+    def state_to_json(self, state):
+        from prophet.serialize import model_to_json
+        return {"model": model_to_json(state["model"])}
+
+    def state_from_json(self, obj):
+        from prophet.serialize import model_from_json
+        return {"model": model_from_json(obj["model"])}
+
+    def forecast(self, history, future, keys=SERIES_KEYS):
+        future_df = pd.DataFrame({"ds": pd.DatetimeIndex(future)})
+        keys = list(keys)
+        if not keys:
+            return self.fit(history).predict(future_df)
+        frames = []
+        for key, ts in history.groupby(keys, sort=True):
+            f = self.fit(ts).predict(future_df)
+            key = key if isinstance(key, tuple) else (key,)
+            for col, value in zip(keys, key):
+                f[col] = value
+            frames.append(f)
+        if not frames:
+            return pd.DataFrame(columns=keys + FORECAST_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+
+class SeasonalProfileForecaster(Forecaster):
+    # Hour-of-day (or hour-of-week) mean profile for every series at once.
+    # Running sums per series x slot give the mean and standard deviation; the
+    # prediction interval is a normal band of the requested width, clipped at zero.
+    # Slots without observations fall back to the series' overall profile.
+    name = "seasonal"
+    vectorized = True
+
+    def __init__(self, interval_width=0.8, season="day", keep_days=28):
+        super().__init__(interval_width)
+        if season not in ("day", "week"):
+            raise ValueError(f"season must be 'day' or 'week', got {season!r}")
+        self.season = season
+        # Per-day sums kept in incremental state for windowed predictions
+        self.keep_days = keep_days
+
+    @property
+    def n_slots(self):
+        return 24 if self.season == "day" else 168
+
+    def params(self):
+        return {**super().params(), "season": self.season}
+
+    def slot(self, ds):
+        ds = pd.DatetimeIndex(ds)
+        hour = np.asarray(ds.hour)
+        if self.season == "week":
+            return np.asarray(ds.dayofweek) * 24 + hour
+        return hour
+
+    def profile_sums(self, codes, n_series, ds, y):
+        # Count, sum and sum of squares per series x slot as (n_series, n_slots) arrays
+        idx = codes * self.n_slots + self.slot(ds)
+        size = n_series * self.n_slots
+        y = np.asarray(y, dtype=float)
+        count = np.bincount(idx, minlength=size).reshape(n_series, self.n_slots).astype(float)
+        s1 = np.bincount(idx, weights=y, minlength=size).reshape(n_series, self.n_slots)
+        s2 = np.bincount(idx, weights=y * y, minlength=size).reshape(n_series, self.n_slots)
+        return count, s1, s2
+
+    def profile(self, count, s1, s2):
+        # Mean and standard deviation per series x slot from running sums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = s1 / count
+            var = (s2 - count * mean ** 2) / (count - 1)
+            total = count.sum(axis=1, keepdims=True)
+            overall_mean = s1.sum(axis=1, keepdims=True) / total
+            overall_var = (s2.sum(axis=1, keepdims=True) - total * overall_mean ** 2) / (total - 1)
+        mean = np.where(count > 0, mean, overall_mean)
+        var = np.where(count > 1, var, overall_var)
+        std = np.sqrt(np.clip(np.nan_to_num(var), 0, None))
+        return np.nan_to_num(mean), std
+
+    def predict_profile(self, mean, std, future):
+        # (n_series, n_future) arrays of yhat and interval bounds
+        slots = self.slot(future)
+        z = NormalDist().inv_cdf(0.5 + self.interval_width / 2)
+        yhat = mean[:, slots]
+        half = z * std[:, slots]
+        return yhat, np.clip(yhat - half, 0, None), yhat + half
+
+    def update_state(self, state, new_rows):
+        # Adds the new rows to running sums: O(new rows), independent of history length.
+        # "totals" covers the full history; "daily" holds the last keep_days days of
+        # hour-of-day sums so a trailing window can be predicted without the raw data.
+        if state is None:
+            zeros = np.zeros(self.n_slots)
+            state = {"totals": [zeros, zeros.copy(), zeros.copy()], "daily": {}}
+        if len(new_rows) == 0:
+            return state
+        ds = pd.DatetimeIndex(new_rows["ds"])
+        codes = np.zeros(len(new_rows), dtype=np.int64)
+        sums = self.profile_sums(codes, 1, ds, new_rows["y"])
+        totals = [t + s[0] for t, s in zip(state["totals"], sums)]
+
+        daily = dict(state["daily"])
+        day_codes, days = pd.factorize(ds.normalize(), sort=True)
+        hours = np.asarray(ds.hour)
+        y = np.asarray(new_rows["y"], dtype=float)
+        idx = day_codes * 24 + hours
+        size = len(days) * 24
+        day_sums = [
+            np.bincount(idx, minlength=size).reshape(-1, 24).astype(float),
+            np.bincount(idx, weights=y, minlength=size).reshape(-1, 24),
+            np.bincount(idx, weights=y * y, minlength=size).reshape(-1, 24),
+        ]
+        for i, day in enumerate(days):
+            key = day.strftime("%Y-%m-%d")
+            previous = daily.get(key, [np.zeros(24)] * 3)
+            daily[key] = [p + d[i] for p, d in zip(previous, day_sums)]
+        if self.keep_days is not None and len(daily) > self.keep_days:
+            daily = dict(sorted(daily.items())[-self.keep_days:])
+        return {"totals": totals, "daily": daily}
+
+    def window_sums(self, state, start=None, end=None):
+        # Count, sum and sum of squares per slot for the days in [start, end], or the full history
+        if start is None and end is None:
+            return [np.asarray(t)[None, :] for t in state["totals"]]
+        start = pd.Timestamp(start).strftime("%Y-%m-%d") if start is not None else ""
+        end = pd.Timestamp(end).strftime("%Y-%m-%d") if end is not None else "9999"
+        sums = [np.zeros(self.n_slots) for _ in range(3)]
+        for key, day_sums in state["daily"].items():
+            if start <= key <= end:
+                offset = pd.Timestamp(key).dayofweek * 24 if self.season == "week" else 0
+                for total, part in zip(sums, day_sums):
+                    total[offset:offset + 24] += part
+        return [t[None, :] for t in sums]
+
+    def predict_state(self, state, future, start=None, end=None):
+        future = pd.DatetimeIndex(future)
+        mean, std = self.profile(*self.window_sums(state, start, end))
+        yhat, lower, upper = self.predict_profile(mean, std, future)
+        return pd.DataFrame({"ds": future, "yhat": yhat[0], "yhat_lower": lower[0], "yhat_upper": upper[0]})
+
+    def state_to_json(self, state):
+        return {
+            "totals": [np.asarray(t).tolist() for t in state["totals"]],
+            "daily": {k: [np.asarray(v).tolist() for v in sums] for k, sums in state["daily"].items()},
+        }
+
+    def state_from_json(self, obj):
+        return {
+            "totals": [np.asarray(t, dtype=float) for t in obj["totals"]],
+            "daily": {k: [np.asarray(v, dtype=float) for v in sums] for k, sums in obj["daily"].items()},
+        }
+
+    def forecast(self, history, future, keys=SERIES_KEYS):
+        keys = list(keys)
+        future = pd.DatetimeIndex(future)
+        if len(history) == 0:
+            return pd.DataFrame(columns=keys + FORECAST_COLUMNS)
+        if keys:
+            codes, uniques = pd.MultiIndex.from_frame(history[keys]).factorize(sort=True)
+            n_series = len(uniques)
+        else:
+            codes, n_series = np.zeros(len(history), dtype=np.int64), 1
+        mean, std = self.profile(*self.profile_sums(codes, n_series, history["ds"], history["y"]))
+        yhat, lower, upper = self.predict_profile(mean, std, future)
+
+        n_future = len(future)
+        out = {}
+        if keys:
+            series_idx = np.repeat(np.arange(n_series), n_future)
+            for level, col in enumerate(keys):
+                out[col] = np.asarray(uniques.get_level_values(level))[series_idx]
+        out["ds"] = np.tile(future.values, n_series)
+        out["yhat"] = yhat.ravel()
+        out["yhat_lower"] = lower.ravel()
+        out["yhat_upper"] = upper.ravel()
+        return pd.DataFrame(out)
+
+
+FORECASTERS = {
+    ProphetForecaster.name: ProphetForecaster,
+    SeasonalProfileForecaster.name: SeasonalProfileForecaster,
+}
+
+
+def get_forecaster(name, **kwargs):
+    try:
+        return FORECASTERS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown forecaster {name!r}; choose from {sorted(FORECASTERS)}") from None
@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import ContextDecorator
+
+
+class _NullSpan(ContextDecorator):
+    # Shared no-op span handed out while tracing is disabled
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(ContextDecorator):
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1].name if stack else None
+        self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        self.tracer._stack().pop()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer._add(self.name, self.start, duration, self.parent, self.depth, self.attrs)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    # Timing spans and counters for one run (a script rerun or a batch job).
+    # When disabled, span() returns a shared no-op object and count() returns
+    # immediately, so instrumented code pays one attribute check per call.
+    #
+    #     tracer = Tracer(enabled=True)
+    #     with tracer.span("fit", station=s):
+    #         ...
+    #     tracer.count("fits")
+    #     tracer.export("trace.json")
+
+    def __init__(self, enabled=False, name="run"):
+        self.enabled = enabled
+        self.name = name
+        self.spans = []
+        self.counters = defaultdict(int)
+        self.origin = time.perf_counter()
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _add(self, name, start, duration, parent=None, depth=0, attrs=None):
+        with self._lock:
+            self.spans.append({
+                "name": name,
+                "start_s": start - self.origin,
+                "duration_s": duration,
+                "parent": parent,
+                "depth": depth,
+                "thread": threading.current_thread().name,
+                **({"attrs": attrs} if attrs else {}),
+            })
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, attrs)
+
+    def record(self, name, duration, start=None, **attrs):
+        # A span measured elsewhere, e.g. timings returned by a worker process. start is
+        # its wall-clock (time.time()) start; without it the span is taken to end now.
+        if self.enabled:
+            stack = self._stack()
+            if start is None:
+                begin = time.perf_counter() - duration
+            else:
+                begin = self.origin + (start - self.started_at)
+            self._add(name, begin, duration, stack[-1].name if stack else None, len(stack), attrs)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += n
+
+    def gauge(self, name, value):
+        # Counters that are snapshots rather than increments (e.g. cache sizes)
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = value
+
+    def summary(self):
+        # Total time and calls per span name, in first-seen order
+        totals = {}
+        for s in self.spans:
+            row = totals.setdefault(s["name"], {"stage": s["name"], "depth": s["depth"], "calls": 0, "total_s": 0.0})
+            row["calls"] += 1
+            row["total_s"] += s["duration_s"]
+        first_seen = {}
+        for s in sorted(self.spans, key=lambda s: s["start_s"]):
+            first_seen.setdefault(s["name"], s["start_s"])
+        return sorted(totals.values(), key=lambda r: first_seen[r["stage"]])
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "wall_s": time.perf_counter() - self.origin,
+            "pid": os.getpid(),
+            "spans": sorted(self.spans, key=lambda s: s["start_s"]),
+            "counters": dict(self.counters),
+        }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), default=str, **kwargs)
+
+    def export(self, path):
+        with open(path, "w") as f:
+            f.write(self.to_json(indent=2))
+        return path
+
+
+def export_trace(tracer, directory=None):
+    # Writes the trace to EV_TRACE_DIR (or `directory`) when set; returns the path
+    directory = directory or os.environ.get("EV_TRACE_DIR")
+    if not directory or not tracer.enabled:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(tracer.started_at))
+    return tracer.export(os.path.join(directory, f"{tracer.name}-{stamp}-{int(tracer.started_at * 1000) % 1000:03d}.json"))
+
+
+def debug_panel(tracer, title="Debug"):
+    # Per-rerun stage timings, counters and a JSON download, for the Streamlit apps
+    if not tracer.enabled:
+        return
+    import pandas as pd
+    import streamlit as st
+    export_trace(tracer)
+    with st.expander(title, expanded=True):
+        summary = pd.DataFrame(tracer.summary())
+        if not summary.empty:
+            summary["stage"] = ["  " * d + s for d, s in zip(summary["depth"], summary["stage"])]
+            summary["total_ms"] = (summary["total_s"] * 1000).round(1)
+            st.dataframe(summary[["stage", "calls", "total_ms"]], hide_index=True)
+        if tracer.counters:
+            st.json(dict(tracer.counters))
+        st.download_button("Download trace (JSON)", tracer.to_json(indent=2),
+                           file_name=f"{tracer.name}-trace.json", mime="application/json")
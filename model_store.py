@@ -0,0 +1,86 @@
+import json
+import os
+import re
+import threading
+
+import pandas as pd
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(text)).strip("_")
+
+
+class ModelStore:
+    # Fitted models and their training cutoffs per (station, vehicle_type).
+    # update() only folds rows newer than the stored cutoff into the model, so a
+    # daily refresh costs roughly the size of the new data. With root=None the
+    # store lives in memory only; otherwise each series is one JSON file under
+    # root/<backend>/.
+
+    def __init__(self, forecaster, root=None):
+        self.forecaster = forecaster
+        self.root = root
+        self._entries = {}
+        self._lock = threading.RLock()
+        if root is not None:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def directory(self):
+        return os.path.join(self.root, self.forecaster.name)
+
+    def path(self, station, vehicle_type):
+        return os.path.join(self.directory, f"{_slug(station)}__{_slug(vehicle_type)}.json")
+
+    def get(self, station, vehicle_type):
+        # Returns {"cutoff": Timestamp, "state": ...} or None
+        key = (station, vehicle_type)
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+        if self.root is None or not os.path.exists(self.path(station, vehicle_type)):
+            return None
+        with open(self.path(station, vehicle_type)) as fh:
+            obj = json.load(fh)
+        entry = {
+            "cutoff": pd.Timestamp(obj["cutoff"]),
+            "state": self.forecaster.state_from_json(obj["state"]),
+        }
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def put(self, station, vehicle_type, state, cutoff):
+        entry = {"cutoff": pd.Timestamp(cutoff), "state": state}
+        with self._lock:
+            self._entries[(station, vehicle_type)] = entry
+        if self.root is not None:
+            obj = {
+                "station_name": station,
+                "vehicle_type": vehicle_type,
+                "backend": self.forecaster.name,
+                "params": self.forecaster.params(),
+                "cutoff": entry["cutoff"].isoformat(),
+                "state": self.forecaster.state_to_json(state),
+            }
+            path = self.path(station, vehicle_type)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as fh:
+                json.dump(obj, fh)
+            os.replace(tmp, path)
+        return entry
+
+    def update(self, station, vehicle_type, ts):
+        # ts: frame with "ds" and "y"; rows at or before the stored cutoff are skipped
+        entry = self.get(station, vehicle_type)
+        new_rows = ts if entry is None else ts[ts["ds"] > entry["cutoff"]]
+        if len(new_rows) == 0:
+            return entry
+        state = self.forecaster.update_state(None if entry is None else entry["state"], new_rows)
+        return self.put(station, vehicle_type, state, new_rows["ds"].max())
+
+    def forecast(self, station, vehicle_type, future, start=None, end=None):
+        entry = self.get(station, vehicle_type)
+        if entry is None:
+            return None
+        return self.forecaster.predict_state(entry["state"], future, start, end)
@@ -0,0 +1,237 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from simulate_ev_data import SESSION_MEAN
+
+# Station capacity dictionary (car/scooter 20-30)
+station_capacity = {
+    "Connaught Place": {"car": 30, "scooter": 28},
+    "Nehru Place": {"car": 28, "scooter": 26},
+    "Rajouri Garden": {"car": 27, "scooter": 25},
+    "Saket": {"car": 29, "scooter": 27},
+    "Dwarka": {"car": 25, "scooter": 23},
+    "Karol Bagh": {"car": 26, "scooter": 24},
+    "Lajpat Nagar": {"car": 30, "scooter": 29},
+    "Vasant Kunj": {"car": 24, "scooter": 21},
+    "Preet Vihar": {"car": 22, "scooter": 20},
+    "Rohini": {"car": 20, "scooter": 20},
+}
+
+# Hourly vehicles one extra port adds at the baseline session length
+VEHICLES_PER_PORT = 5
+OVERLOAD_THRESHOLD = 0.9
+
+
+def capacity_frame(capacity_dict):
+    # Long station_name / vehicle_type / capacity frame for merging
+    return pd.DataFrame(
+        [(s, vtype, cap) for s, caps in capacity_dict.items() for vtype, cap in caps.items()],
+        columns=["station_name", "vehicle_type", "capacity"],
+    )
+
+
+def peak_demand(forecast_df):
+    return (
+        forecast_df.groupby(['station_id', 'station_name', 'vehicle_type'], as_index=False)
+        .agg({'yhat': 'max'})
+        .rename(columns={'yhat': 'forecasted_peak'})
+    )
+
+
+# Function to get overloaded stations
+def get_overloaded_stations(forecast_df, capacity_dict):
+    peak_df = peak_demand(forecast_df)
+    peak_df = peak_df.merge(capacity_frame(capacity_dict), on=['station_name', 'vehicle_type'], how='left')
+    peak_df['overload_pct'] = peak_df['forecasted_peak'] / peak_df['capacity']
+    peak_df['unmet_demand'] = peak_df['forecasted_peak'] - peak_df['capacity']
+    overloaded = peak_df[peak_df['overload_pct'] > OVERLOAD_THRESHOLD]
+    message = ""
+    # Always show 3 stations: overloaded first, then next busiest
+    if overloaded.empty:
+        busiest = peak_df.sort_values('forecasted_peak', ascending=False).head(3)
+        busiest['recommendation'] = 'Monitor usage'
+        result = busiest
+        message = "No station exceeds 90% of its capacity. Showing top 3 busiest stations."
+    else:
+        overloaded = overloaded.copy()
+        overloaded['recommendation'] = overloaded['unmet_demand'].apply(
+            lambda x: f"Add {int(np.ceil(x/VEHICLES_PER_PORT))} more ports" if x > 0 else "Monitor usage"
+        )
+        # Get next busiest stations not overloaded
+        not_overloaded = peak_df[~peak_df.index.isin(overloaded.index)]
+        next_busiest = not_overloaded.sort_values('forecasted_peak', ascending=False).head(2)
+        next_busiest['recommendation'] = 'Monitor usage'
+        result = pd.concat([overloaded, next_busiest]).sort_values('forecasted_peak', ascending=False).head(3)
+        if (overloaded['forecasted_peak'] > overloaded['capacity']).any():
+            message = "Some stations exceed their maximum capacity! Immediate action required."
+        else:
+            message = "Some stations are above 90% capacity. Consider adding more ports."
+    return result[['station_id', 'vehicle_type', 'forecasted_peak', 'capacity', 'unmet_demand', 'recommendation']], message
+
+
+def scenario_grid(extra_ports=(0,), demand_multiplier=(1.0,), session_minutes=(np.nan,)):
+    # Cartesian product of What-If parameters; a NaN session keeps each vehicle type's baseline
+    ports, mult, session = np.meshgrid(
+        np.asarray(extra_ports, dtype=float),
+        np.asarray(demand_multiplier, dtype=float),
+        np.asarray(session_minutes, dtype=float),
+        indexing="ij",
+    )
+    grid = pd.DataFrame({
+        "extra_ports": ports.ravel().astype(int),
+        "demand_multiplier": mult.ravel(),
+        "session_minutes": session.ravel(),
+    })
+    grid.index.name = "scenario"
+    return grid
+
+
+def evaluate_scenarios(forecast_df, capacity_dict, scenarios):
+    # Every station x vehicle type x scenario in one broadcast computation.
+    # Demand scales with the multiplier; capacity grows by VEHICLES_PER_PORT per extra
+    # port and scales with baseline session length / scenario session length.
+    peak_df = peak_demand(forecast_df).merge(
+        capacity_frame(capacity_dict), on=['station_name', 'vehicle_type'], how='left'
+    )
+    baseline = peak_df['vehicle_type'].map(SESSION_MEAN).to_numpy(dtype=float)[:, None]
+    peak = peak_df['forecasted_peak'].to_numpy(dtype=float)[:, None]
+    capacity = peak_df['capacity'].to_numpy(dtype=float)[:, None]
+
+    ports = scenarios['extra_ports'].to_numpy(dtype=float)[None, :]
+    mult = scenarios['demand_multiplier'].to_numpy(dtype=float)[None, :]
+    session = scenarios['session_minutes'].to_numpy(dtype=float)[None, :]
+    throughput = baseline / np.where(np.isnan(session), baseline, session)
+
+    demand = peak * mult
+    effective_capacity = (capacity + ports * VEHICLES_PER_PORT) * throughput
+    overload_pct = demand / effective_capacity
+    unmet = demand - effective_capacity
+    recommended_ports = np.ceil(np.clip(unmet, 0, None) / (VEHICLES_PER_PORT * throughput))
+
+    n_series, n_scenarios = demand.shape
+    series_idx = np.repeat(np.arange(n_series), n_scenarios)
+    scenario_idx = np.tile(np.arange(n_scenarios), n_series)
+    result = peak_df.iloc[series_idx][['station_id', 'station_name', 'vehicle_type', 'forecasted_peak', 'capacity']]
+    result = result.reset_index(drop=True)
+    result.insert(0, 'scenario', scenarios.index.to_numpy()[scenario_idx])
+    for col in ['extra_ports', 'demand_multiplier', 'session_minutes']:
+        result[col] = scenarios[col].to_numpy()[scenario_idx]
+    result['demand'] = demand.ravel()
+    result['effective_capacity'] = effective_capacity.ravel()
+    result['overload_pct'] = overload_pct.ravel()
+    result['unmet_demand'] = unmet.ravel()
+    result['recommended_ports'] = recommended_ports.ravel()
+    return result
+
+
+def summarize_scenarios(results):
+    # One row per scenario: how many series are overloaded and the ports needed overall
+    results = results.assign(
+        overloaded=results['overload_pct'] > OVERLOAD_THRESHOLD,
+        positive_unmet=results['unmet_demand'].clip(lower=0),
+    )
+    summary = results.groupby('scenario').agg(
+        overloaded_series=('overloaded', 'sum'),
+        max_overload_pct=('overload_pct', 'max'),
+        total_unmet_demand=('positive_unmet', 'sum'),
+        recommended_ports=('recommended_ports', 'sum'),
+    )
+    params = results.drop_duplicates('scenario').set_index('scenario')[['extra_ports', 'demand_multiplier', 'session_minutes']]
+    return params.join(summary).reset_index()
+
+
+def _interval_sigma(forecast_df, interval_width):
+    # Prophet-style interval -> normal standard deviation per row. Uses the upper
+    # half-width: the forecasters clip yhat_lower at 0, which would narrow the band
+    # (and understate risk) at low-demand hours.
+    z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+    return ((forecast_df['yhat_upper'] - forecast_df['yhat']) / z).clip(lower=0).to_numpy(dtype=float)
+
+
+def overload_probability(forecast_df, capacity_dict, n_draws=2000, method="interval", target_risk=0.05,
+                         interval_width=0.8, seed=None, batch_size=8):
+    # Monte Carlo overload risk for every station x vehicle type.
+    # Draws n_draws demand trajectories per series, either normal around yhat with the
+    # spread of the forecast interval ("interval") or Poisson with mean yhat as in
+    # simulate_ev_data ("poisson"), as (series, draws, hours) arrays in batches of
+    # batch_size series; small batches keep the reused draw buffer cache-resident.
+    # Returns (hourly, summary):
+    #   hourly:  per series and hour, P(demand > capacity) and expected unmet demand
+    #   summary: per series, P(any hour exceeds capacity), expected unmet demand over the
+    #            horizon, the (1 - target_risk) quantile of peak demand and the ports to add
+    #            so that the peak exceeds capacity with probability <= target_risk
+    # Series missing from capacity_dict get NaN for every risk column.
+    if method not in ("interval", "poisson"):
+        raise ValueError(f"method must be 'interval' or 'poisson', got {method!r}")
+    if method == "interval" and not {'yhat_lower', 'yhat_upper'} <= set(forecast_df.columns):
+        raise ValueError("method='interval' needs yhat_lower and yhat_upper columns")
+    keys = ['station_id', 'station_name', 'vehicle_type']
+    df = forecast_df.sort_values(keys + ['ds'], kind='stable').reset_index(drop=True)
+    hours = np.sort(df['ds'].unique())
+    series = df[keys].drop_duplicates().reset_index(drop=True)
+    series = series.merge(capacity_frame(capacity_dict), on=['station_name', 'vehicle_type'], how='left')
+    n_series, n_hours = len(series), len(hours)
+
+    # Dense (series, hours) grids; hours missing from a series have zero demand
+    series_idx = df.groupby(keys, sort=False).ngroup().to_numpy()
+    hour_idx = np.searchsorted(hours, df['ds'].to_numpy())
+    mean = np.zeros((n_series, n_hours))
+    mean[series_idx, hour_idx] = df['yhat'].clip(lower=0).to_numpy(dtype=float)
+    sigma = np.zeros((n_series, n_hours))
+    if method == "interval":
+        sigma[series_idx, hour_idx] = _interval_sigma(df, interval_width)
+    capacity = series['capacity'].to_numpy(dtype=float)
+
+    rng = np.random.default_rng(seed)
+    mean32, sigma32 = mean.astype(np.float32), sigma.astype(np.float32)
+    exceed_prob = np.empty((n_series, n_hours))
+    expected_unmet = np.empty((n_series, n_hours))
+    peak_exceed_prob = np.empty(n_series)
+    peak_quantile = np.empty(n_series)
+    q = min(int(np.ceil((1 - target_risk) * n_draws)) - 1, n_draws - 1)
+    if method == "interval":
+        # Common random numbers: one noise block shared by every series. Each series'
+        # own statistics are unaffected; only cross-series correlation changes.
+        noise = rng.standard_normal((n_draws, n_hours), dtype=np.float32)
+    # Draw and mask buffers are allocated once and reused by every batch
+    buffer = np.empty((min(batch_size, n_series), n_draws, n_hours), dtype=np.float32)
+    mask = np.empty(buffer.shape, dtype=bool)
+    for start in range(0, n_series, batch_size):
+        sl = slice(start, start + batch_size)
+        n = len(range(*sl.indices(n_series)))
+        draws, over = buffer[:n], mask[:n]
+        if method == "interval":
+            np.multiply(sigma32[sl][:, None, :], noise[None, :, :], out=draws)
+            draws += mean32[sl][:, None, :]
+        else:
+            draws[...] = rng.poisson(np.broadcast_to(mean[sl][:, None, :], draws.shape))
+        # Negative normal draws never exceed a capacity >= 0, so no clipping is needed
+        cap = capacity[sl].astype(np.float32)
+        peak = draws.max(axis=2)
+        peak_exceed_prob[sl] = np.count_nonzero(peak > cap[:, None], axis=1) / n_draws
+        peak_quantile[sl] = np.partition(peak, q, axis=1)[:, q]
+        draws -= cap[:, None, None]
+        exceed_prob[sl] = np.count_nonzero(np.greater(draws, 0, out=over), axis=1) / n_draws
+        expected_unmet[sl] = np.maximum(draws, 0, out=draws).sum(axis=1) / n_draws
+    # Series without a capacity entry have no risk to report; NaN compares False above
+    # and would otherwise read as zero probability
+    no_capacity = np.isnan(capacity)
+    peak_exceed_prob[no_capacity] = np.nan
+    exceed_prob[no_capacity] = np.nan
+
+    hourly = series.iloc[np.repeat(np.arange(n_series), n_hours)].reset_index(drop=True)
+    hourly['ds'] = np.tile(hours, n_series)
+    hourly['yhat'] = mean.ravel()
+    hourly['exceed_prob'] = exceed_prob.ravel()
+    hourly['expected_unmet'] = expected_unmet.ravel()
+
+    summary = series.copy()
+    summary['forecasted_peak'] = mean.max(axis=1)
+    summary['peak_exceed_prob'] = peak_exceed_prob
+    summary['max_hour_exceed_prob'] = exceed_prob.max(axis=1)
+    summary['expected_unmet_demand'] = expected_unmet.sum(axis=1)
+    summary['peak_at_target_risk'] = np.clip(peak_quantile, 0, None)
+    summary['ports_needed'] = np.ceil(np.clip(peak_quantile - capacity, 0, None) / VEHICLES_PER_PORT)
+    return hourly, summary
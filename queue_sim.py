@@ -0,0 +1,164 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from simulate_ev_data import MIN_SESSION_MINUTES, SESSION_MEAN, SESSION_STD
+
+
+def simulate_queue(arrivals, service, ports, initial_free=None):
+    # FCFS multi-port queue driven by a heap of port-free events.
+    # arrivals must be sorted (minutes); service is each session's length. Each arrival
+    # pops the earliest departure, starts charging at max(arrival, departure) and pushes
+    # its own departure. initial_free gives the times ports become free (busy at start).
+    # Returns each arrival's wait in minutes.
+    n = len(arrivals)
+    waits = np.zeros(n)
+    if ports <= 0:
+        waits[:] = np.inf
+        return waits
+    free = [0.0] * ports if initial_free is None else sorted(float(t) for t in initial_free)
+    free += [0.0] * (ports - len(free))
+    heapq.heapify(free)
+    arrival_list = arrivals.tolist() if isinstance(arrivals, np.ndarray) else list(arrivals)
+    service_list = service.tolist() if isinstance(service, np.ndarray) else list(service)
+    out = [0.0] * n
+    heapreplace = heapq.heapreplace
+    for i in range(n):
+        t = arrival_list[i]
+        port_free = free[0]
+        start = port_free if port_free > t else t
+        out[i] = start - t
+        heapreplace(free, start + service_list[i])
+    waits[:] = out
+    return waits
+
+
+def arrivals_from_demand(hourly_demand, rng):
+    # Poisson arrivals per hour at the given hourly rates, uniform within each hour
+    counts = rng.poisson(np.clip(np.asarray(hourly_demand, dtype=float), 0, None))
+    hours = np.repeat(np.arange(len(counts)), counts)
+    return np.sort(hours * 60.0 + rng.random(len(hours)) * 60.0)
+
+
+def session_lengths(vehicle_type, n, rng):
+    mean = SESSION_MEAN.get(vehicle_type, SESSION_MEAN["car"])
+    return np.maximum(MIN_SESSION_MINUTES, rng.normal(mean, SESSION_STD, n))
+
+
+def _ports_for(ports, station, vehicle_type):
+    if isinstance(ports, dict):
+        value = ports.get((station, vehicle_type), ports.get(station))
+        if isinstance(value, dict):
+            value = value.get(vehicle_type)
+        return int(value) if value is not None else 0
+    return int(ports)
+
+
+def wait_stats(waits):
+    if len(waits) == 0:
+        return {"sessions": 0, "wait_mean": 0.0, "wait_p50": 0.0, "wait_p95": 0.0, "wait_max": 0.0, "waited_share": 0.0}
+    p50, p95 = np.percentile(waits, [50, 95])
+    return {
+        "sessions": len(waits),
+        "wait_mean": float(waits.mean()),
+        "wait_p50": float(p50),
+        "wait_p95": float(p95),
+        "wait_max": float(waits.max()),
+        "waited_share": float((waits > 0).mean()),
+    }
+
+
+def simulate_stations(demand_df, ports, demand_col="vehicles_charged", runs=1, seed=None):
+    # Simulates every station x vehicle type series in demand_df (long frame with
+    # station_name, vehicle_type, ds and an hourly demand column, e.g. simulate_ev_data
+    # output or forecasts with demand_col="yhat"). ports is an int, a
+    # {(station, vehicle_type): n} dict or a station_capacity-style nested dict.
+    # Returns one row of wait-time statistics per series.
+    rng = np.random.default_rng(seed)
+    rows = []
+    hourly = demand_df.groupby(["station_name", "vehicle_type", "ds"], sort=True)[demand_col].sum()
+    for (station, vtype), series in hourly.groupby(level=[0, 1], sort=False):
+        # Hourly rates on a continuous grid so idle hours are kept
+        ds = series.index.get_level_values("ds")
+        grid = pd.date_range(ds.min(), ds.max(), freq="h")
+        demand = series.droplevel([0, 1]).reindex(grid, fill_value=0).to_numpy()
+        n_ports = _ports_for(ports, station, vtype)
+        waits = []
+        for _ in range(runs):
+            arrivals = arrivals_from_demand(demand, rng)
+            waits.append(simulate_queue(arrivals, session_lengths(vtype, len(arrivals), rng), n_ports))
+        waits = np.concatenate(waits) if waits else np.array([])
+        service_hours = len(waits) * SESSION_MEAN.get(vtype, SESSION_MEAN["car"]) / 60
+        rows.append({
+            "station_name": station,
+            "vehicle_type": vtype,
+            "ports": n_ports,
+            **wait_stats(waits),
+            "utilization": service_hours / max(n_ports * len(grid) * runs, 1),
+        })
+    return pd.DataFrame(rows)
+
+
+def size_ports(demand_df, target_p95_minutes=10.0, max_ports=60, demand_col="vehicles_charged", runs=3, seed=None):
+    # Smallest port count per series whose simulated p95 wait meets the target.
+    # Binary search over port counts, reusing the same arrivals for every count.
+    rng = np.random.default_rng(seed)
+    rows = []
+    hourly = demand_df.groupby(["station_name", "vehicle_type", "ds"], sort=True)[demand_col].sum()
+    for (station, vtype), series in hourly.groupby(level=[0, 1], sort=False):
+        ds = series.index.get_level_values("ds")
+        grid = pd.date_range(ds.min(), ds.max(), freq="h")
+        demand = series.droplevel([0, 1]).reindex(grid, fill_value=0).to_numpy()
+        samples = []
+        for _ in range(runs):
+            arrivals = arrivals_from_demand(demand, rng)
+            samples.append((arrivals, session_lengths(vtype, len(arrivals), rng)))
+
+        def p95(n_ports):
+            waits = np.concatenate([simulate_queue(a, s, n_ports) for a, s in samples])
+            return float(np.percentile(waits, 95)) if len(waits) else 0.0
+
+        lo, hi = 1, max_ports
+        if p95(hi) > target_p95_minutes:
+            lo = hi + 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if p95(mid) <= target_p95_minutes:
+                hi = mid
+            else:
+                lo = mid + 1
+        rows.append({
+            "station_name": station,
+            "vehicle_type": vtype,
+            "ports_needed": lo if lo <= max_ports else np.nan,
+            "wait_p95": p95(min(lo, max_ports)),
+        })
+    return pd.DataFrame(rows)
+
+
+def current_wait_distribution(ports, waiting, session, runs=200, seed=None):
+    # Wait for a vehicle arriving now at each station, given its ports, the vehicles
+    # already waiting and the average session. Busy ports free up after a uniform
+    # share of a session; waiting vehicles are served first. Returns (p50, p95) arrays.
+    rng = np.random.default_rng(seed)
+    ports = np.asarray(ports, dtype=int)
+    waiting = np.asarray(waiting, dtype=int)
+    session = np.asarray(session, dtype=float)
+    p50 = np.zeros(len(ports))
+    p95 = np.zeros(len(ports))
+    for i in range(len(ports)):
+        if ports[i] <= 0:
+            p50[i] = p95[i] = np.inf
+            continue
+        if waiting[i] == 0:
+            continue
+        n = waiting[i] + 1
+        waits = np.empty(runs)
+        arrivals = np.zeros(n)
+        for r in range(runs):
+            initial_free = rng.random(ports[i]) * session[i]
+            service = np.maximum(MIN_SESSION_MINUTES, rng.normal(session[i], SESSION_STD, n))
+            waits[r] = simulate_queue(arrivals, service, ports[i], initial_free)[-1]
+        p50[i], p95[i] = np.percentile(waits, [50, 95])
+    return p50, p95
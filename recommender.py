@@ -0,0 +1,216 @@
+import random
+from math import radians, sin, cos, sqrt, atan2
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.195
+
+# Fixed station data
+stations = [
+    {"name": "Connaught Place", "lat": 28.6315, "lon": 77.2167},
+    {"name": "Saket", "lat": 28.5222, "lon": 77.2066},
+    {"name": "Dwarka", "lat": 28.5921, "lon": 77.0460},
+    {"name": "Karol Bagh", "lat": 28.6512, "lon": 77.1905},
+    {"name": "Lajpat Nagar", "lat": 28.5672, "lon": 77.2436},
+    {"name": "Rajouri Garden", "lat": 28.6426, "lon": 77.1197},
+    {"name": "Vasant Kunj", "lat": 28.5206, "lon": 77.1571},
+    {"name": "Preet Vihar", "lat": 28.6469, "lon": 77.3024},
+    {"name": "Rohini", "lat": 28.7499, "lon": 77.0560},
+    {"name": "Nehru Place", "lat": 28.5483, "lon": 77.2513},
+]
+
+
+def make_charger_stations(n, seed=None, bounds=((28.40, 28.88), (76.84, 77.35))):
+    # Synthetic public chargers spread over the city, for load testing
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(*bounds[0], size=n)
+    lons = rng.uniform(*bounds[1], size=n)
+    return [{"name": f"Charger {i + 1}", "lat": round(float(lat), 5), "lon": round(float(lon), 5)}
+            for i, (lat, lon) in enumerate(zip(lats, lons))]
+
+
+# Simulate station data
+def simulate_station_data(station_list=None):
+    data = []
+    for s in stations if station_list is None else station_list:
+        car_ports = random.randint(2, 6)
+        scooter_ports = random.randint(3, 8)
+        car_waiting = random.randint(0, car_ports)
+        scooter_waiting = random.randint(0, scooter_ports)
+        car_session = random.randint(30, 90)  # minutes
+        scooter_session = random.randint(20, 60)
+        traffic_speed = random.randint(15, 30)
+        data.append({
+            "name": s["name"],
+            "lat": s["lat"],
+            "lon": s["lon"],
+            "car_ports": car_ports,
+            "scooter_ports": scooter_ports,
+            "car_waiting": car_waiting,
+            "scooter_waiting": scooter_waiting,
+            "car_session": car_session,
+            "scooter_session": scooter_session,
+            "traffic_speed": traffic_speed,
+        })
+    return data
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    R = EARTH_RADIUS_KM
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    return R * c
+
+
+def compute_eta(station, user_lat, user_lon, vehicle_type):
+    if vehicle_type == "car":
+        ports, waiting, avg_session = station["car_ports"], station["car_waiting"], station["car_session"]
+    else:
+        ports, waiting, avg_session = station["scooter_ports"], station["scooter_waiting"], station["scooter_session"]
+
+    distance = haversine(user_lat, user_lon, station["lat"], station["lon"])
+    queue_time = (waiting / ports) * avg_session if ports > 0 else 0
+    travel_time = (distance / station["traffic_speed"]) * 60 if station["traffic_speed"] > 0 else 0
+    total_eta = queue_time + travel_time
+
+    return {
+        **station,
+        "distance_km": round(distance, 2),
+        "queue_time": round(queue_time, 1),
+        "travel_time": round(travel_time, 1),
+        "total_eta": round(total_eta, 1),
+        "recommended": False,
+    }
+
+
+def haversine_np(lat1, lon1, lat2, lon2):
+    # Vectorized haversine in km; arguments in degrees and broadcast against each other
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def queue_minutes(ports, waiting, avg_session):
+    # (waiting / ports) * avg_session, 0 where a station has no ports
+    ports = np.asarray(ports, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ports > 0, np.asarray(waiting) / ports * np.asarray(avg_session), 0.0)
+
+
+def travel_minutes(distance_km, traffic_speed):
+    speed = np.asarray(traffic_speed, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(speed > 0, distance_km / speed * 60, 0.0)
+
+
+class StationIndex:
+    # Uniform lat/lon grid over the stations with their current state as arrays.
+    # Queries only score stations in grid cells that can be reached within a travel
+    # time bound, then pick the top k by total ETA (queue + travel) with argpartition.
+    # The grid is equirectangular around the stations' mean latitude, which is fine
+    # at city scale. queue_times optionally replaces the (waiting / ports) * session
+    # estimate with per-station minutes for a vehicle type, e.g. simulated waits.
+
+    def __init__(self, station_data, cell_km=2.0, queue_times=None):
+        self.station_data = list(station_data)
+        self.cell_km = cell_km
+        self.queue_times = {t: np.asarray(q, dtype=float) for t, q in (queue_times or {}).items()}
+        cols = ["lat", "lon", "car_ports", "scooter_ports", "car_waiting", "scooter_waiting",
+                "car_session", "scooter_session", "traffic_speed"]
+        arrays = {c: np.array([s[c] for s in self.station_data], dtype=float) for c in cols}
+        self.lat, self.lon = arrays["lat"], arrays["lon"]
+        self.state = {
+            "car": (arrays["car_ports"], arrays["car_waiting"], arrays["car_session"]),
+            "scooter": (arrays["scooter_ports"], arrays["scooter_waiting"], arrays["scooter_session"]),
+        }
+        self.traffic_speed = arrays["traffic_speed"]
+        self.max_speed = float(self.traffic_speed.max()) if len(self.traffic_speed) else 0.0
+
+        mean_lat = float(self.lat.mean()) if len(self.lat) else 0.0
+        self.cell_lat = cell_km / KM_PER_DEGREE
+        self.cell_lon = cell_km / (KM_PER_DEGREE * max(np.cos(np.radians(mean_lat)), 1e-6))
+        rows, cols_ = self._cell(self.lat, self.lon)
+        self._row_min = int(rows.min()) if len(rows) else 0
+        self._col_min = int(cols_.min()) if len(cols_) else 0
+        self._n_cols = int(cols_.max()) - self._col_min + 1 if len(cols_) else 1
+        keys = (rows - self._row_min) * self._n_cols + (cols_ - self._col_min)
+        self._order = np.argsort(keys, kind="stable")
+        self._keys = keys[self._order]
+        self._n_rows = int(rows.max()) - self._row_min + 1 if len(rows) else 0
+
+    def __len__(self):
+        return len(self.station_data)
+
+    def _cell(self, lat, lon):
+        return (np.floor(np.asarray(lat) / self.cell_lat).astype(np.int64),
+                np.floor(np.asarray(lon) / self.cell_lon).astype(np.int64))
+
+    def candidates(self, lat, lon, radius_km):
+        # Indices of stations in the grid cells overlapping the radius' bounding box
+        if radius_km is None or not np.isfinite(radius_km):
+            return np.arange(len(self))
+        reach = int(np.ceil(radius_km / self.cell_km)) + 1
+        row, col = (int(x) for x in self._cell(lat, lon))
+        row0 = max(row - reach - self._row_min, 0)
+        row1 = min(row + reach - self._row_min, self._n_rows - 1)
+        col0 = max(col - reach - self._col_min, 0)
+        col1 = min(col + reach - self._col_min, self._n_cols - 1)
+        if row0 > row1 or col0 > col1:
+            return np.array([], dtype=np.int64)
+        row_ids = np.arange(row0, row1 + 1)
+        lo = np.searchsorted(self._keys, row_ids * self._n_cols + col0, "left")
+        hi = np.searchsorted(self._keys, row_ids * self._n_cols + col1, "right")
+        return np.concatenate([self._order[a:b] for a, b in zip(lo, hi)])
+
+    def score(self, idx, user_lat, user_lon, vehicle_type):
+        # Distance, queue, travel and total ETA arrays for the given station indices
+        distance = haversine_np(user_lat, user_lon, self.lat[idx], self.lon[idx])
+        if vehicle_type in self.queue_times:
+            queue_time = self.queue_times[vehicle_type][idx]
+        else:
+            ports, waiting, session = (a[idx] for a in self.state[vehicle_type])
+            queue_time = queue_minutes(ports, waiting, session)
+        travel_time = travel_minutes(distance, self.traffic_speed[idx])
+        return distance, queue_time, travel_time, queue_time + travel_time
+
+    def nearest_k(self, user_lat, user_lon, vehicle_type, k=5, max_travel_minutes=None):
+        # Top k stations by total ETA among those reachable within max_travel_minutes.
+        # The search radius doubles until the k-th ETA is below the fastest possible
+        # travel time to any station outside it, so the result is exact.
+        if len(self) == 0 or k <= 0:
+            return []
+        limit_km = np.inf if max_travel_minutes is None else max_travel_minutes / 60 * self.max_speed
+        radius_km = min(self.cell_km, limit_km)
+        while True:
+            idx = self.candidates(user_lat, user_lon, radius_km)
+            distance, queue_time, travel_time, total = self.score(idx, user_lat, user_lon, vehicle_type)
+            keep = distance <= radius_km
+            if max_travel_minutes is not None:
+                keep &= travel_time <= max_travel_minutes
+            idx, distance, queue_time, travel_time, total = (a[keep] for a in (idx, distance, queue_time, travel_time, total))
+            outside_eta = radius_km / self.max_speed * 60 if self.max_speed > 0 else np.inf
+            done = radius_km >= limit_km or len(idx) == len(self)
+            if not done and len(idx) >= k and np.partition(total, k - 1)[k - 1] <= outside_eta:
+                done = True
+            if done:
+                break
+            radius_km = min(radius_km * 2, limit_km)
+
+        top = np.argpartition(total, k - 1)[:k] if len(total) > k else np.arange(len(total))
+        top = top[np.argsort(total[top], kind="stable")]
+        results = []
+        for j in top:
+            results.append({
+                **self.station_data[idx[j]],
+                "distance_km": round(float(distance[j]), 2),
+                "queue_time": round(float(queue_time[j]), 1),
+                "travel_time": round(float(travel_time[j]), 1),
+                "total_eta": round(float(total[j]), 1),
+                "recommended": False,
+            })
+        if results:
+            results[0]["recommended"] = True
+        return results
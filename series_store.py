@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from forecasters import SERIES_KEYS
+
+
+def parse_ds(df):
+    # Hourly timestamp from the simulator's "%d-%m-%Y" date and hour columns.
+    # Dates repeat for every station-hour, so each distinct string is parsed once.
+    codes, dates = pd.factorize(df["date"])
+    days = pd.to_datetime(pd.Index(dates), format="%d-%m-%Y")
+    return pd.DatetimeIndex(days.values[codes]) + pd.to_timedelta(np.asarray(df["hour"]), unit="h")
+
+
+class SeriesStore:
+    # Hourly demand per (station, vehicle_type), parsed and indexed once.
+    # Timestamps are parsed a single time, keys are categoricals, every series has a
+    # sorted DatetimeIndex so window slices are binary searches, and station metadata
+    # lives in a dict.
+
+    def __init__(self, df):
+        station_names = pd.unique(df["station_name"])
+        vehicle_types = pd.unique(df["vehicle_type"])
+        hourly = pd.DataFrame({
+            "station_name": pd.Categorical(df["station_name"], categories=station_names),
+            "vehicle_type": pd.Categorical(df["vehicle_type"], categories=vehicle_types),
+            "ds": parse_ds(df),
+            "y": df["vehicles_charged"].to_numpy(),
+        })
+        hourly = hourly.groupby(SERIES_KEYS + ["ds"], observed=True, sort=True)["y"].sum().reset_index()
+        # Long frame of every series sorted by time, for all-series window slices
+        self.hourly = hourly.sort_values("ds", kind="stable").reset_index(drop=True)
+        self._hourly_ds = self.hourly["ds"].to_numpy()
+
+        self.station_names = list(station_names)
+        self.vehicle_types = list(vehicle_types)
+        self.series = {}
+        for (station, vtype), group in hourly.groupby(SERIES_KEYS, observed=True, sort=False):
+            self.series[(station, vtype)] = pd.Series(
+                group["y"].to_numpy(), index=pd.DatetimeIndex(group["ds"]), name="y"
+            )
+
+        meta = df.drop_duplicates("station_name").set_index("station_name")
+        meta_cols = [c for c in ("station_id", "latitude", "longitude") if c in meta.columns]
+        self.stations = meta[meta_cols].to_dict("index")
+
+    def __contains__(self, key):
+        return key in self.series
+
+    def station_meta(self, station):
+        return self.stations[station]
+
+    def station_id(self, station):
+        return self.stations[station]["station_id"]
+
+    def available_dates(self, station, vehicle_type):
+        series = self.series.get((station, vehicle_type))
+        if series is None:
+            return np.array([], dtype=object)
+        return series.index.normalize().unique().date
+
+    def window(self, station, vehicle_type, start=None, end=None):
+        # Frame of ds, y for one series within [start, end]
+        series = self.series.get((station, vehicle_type))
+        if series is None:
+            return pd.DataFrame({"ds": pd.DatetimeIndex([]), "y": np.array([], dtype=np.int64)})
+        sliced = series.loc[start:end]
+        return pd.DataFrame({"ds": sliced.index, "y": sliced.to_numpy()})
+
+    def history(self, start=None, end=None):
+        # Long frame of every series within [start, end]
+        lo = 0 if start is None else np.searchsorted(self._hourly_ds, np.datetime64(pd.Timestamp(start)), "left")
+        hi = len(self._hourly_ds) if end is None else np.searchsorted(self._hourly_ds, np.datetime64(pd.Timestamp(end)), "right")
+        return self.hourly.iloc[lo:hi]
@@ -1,51 +1,212 @@
-def simulate_ev_data():
-    import pandas as pd
-    import numpy as np
-    import random
-    from datetime import datetime, timedelta
-    stations = [
-        {"station_id": 1, "station_name": "Connaught Place", "latitude": 28.6315, "longitude": 77.2167},
-        {"station_id": 2, "station_name": "Saket", "latitude": 28.5222, "longitude": 77.2076},
-        {"station_id": 3, "station_name": "Dwarka", "latitude": 28.5921, "longitude": 77.0460},
-        {"station_id": 4, "station_name": "Karol Bagh", "latitude": 28.6512, "longitude": 77.1906},
-        {"station_id": 5, "station_name": "Lajpat Nagar", "latitude": 28.5672, "longitude": 77.2436},
-        {"station_id": 6, "station_name": "Rajouri Garden", "latitude": 28.6426, "longitude": 77.1232},
-        {"station_id": 7, "station_name": "Vasant Kunj", "latitude": 28.5273, "longitude": 77.1506},
-        {"station_id": 8, "station_name": "Preet Vihar", "latitude": 28.6507, "longitude": 77.3012},
-        {"station_id": 9, "station_name": "Rohini", "latitude": 28.7499, "longitude": 77.0560},
-        {"station_id": 10, "station_name": "Nehru Place", "latitude": 28.5483, "longitude": 77.2513},
-    ]
-    vehicle_types = ["car", "scooter"]
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from datetime import date as _date, datetime, timedelta
+
+STATIONS = [
+    {"station_id": 1, "station_name": "Connaught Place", "latitude": 28.6315, "longitude": 77.2167},
+    {"station_id": 2, "station_name": "Saket", "latitude": 28.5222, "longitude": 77.2076},
+    {"station_id": 3, "station_name": "Dwarka", "latitude": 28.5921, "longitude": 77.0460},
+    {"station_id": 4, "station_name": "Karol Bagh", "latitude": 28.6512, "longitude": 77.1906},
+    {"station_id": 5, "station_name": "Lajpat Nagar", "latitude": 28.5672, "longitude": 77.2436},
+    {"station_id": 6, "station_name": "Rajouri Garden", "latitude": 28.6426, "longitude": 77.1232},
+    {"station_id": 7, "station_name": "Vasant Kunj", "latitude": 28.5273, "longitude": 77.1506},
+    {"station_id": 8, "station_name": "Preet Vihar", "latitude": 28.6507, "longitude": 77.3012},
+    {"station_id": 9, "station_name": "Rohini", "latitude": 28.7499, "longitude": 77.0560},
+    {"station_id": 10, "station_name": "Nehru Place", "latitude": 28.5483, "longitude": 77.2513},
+]
+VEHICLE_TYPES = ["car", "scooter"]
+VEHICLE_WEIGHTS = [0.7, 0.3]
+SESSION_MEAN = {"car": 40, "scooter": 25}
+SESSION_STD = 8
+MIN_SESSION_MINUTES = 10
+
+# Bounding box used to place extra synthetic stations around Delhi
+DELHI_BOUNDS = {"lat": (28.40, 28.88), "lon": (76.84, 77.35)}
+
+CONGESTION_LEVELS = ["Low", "Medium", "High"]
+
+
+def _hour_bands():
+    # Per hour of day: Poisson mean, constant offset and congestion level index
+    lam = np.full(24, 2.0)
+    offset = np.zeros(24, dtype=np.int64)
+    congestion = np.zeros(24, dtype=np.int64)
+    for hour in range(24):
+        if 8 <= hour <= 10 or 17 <= hour <= 20:
+            lam[hour], offset[hour], congestion[hour] = 10, 5, 2
+        elif 7 <= hour < 8 or 10 < hour < 12 or 16 <= hour < 17 or 20 < hour < 22:
+            lam[hour], offset[hour], congestion[hour] = 5, 2, 1
+    return lam, offset, congestion
+
+
+HOUR_LAMBDA, HOUR_OFFSET, HOUR_CONGESTION = _hour_bands()
+
+
+def default_start_date():
+    # Monday of the previous week
     today = datetime.now().date()
-    days = 7
-    rows = []
-    start_date = today - timedelta(days=today.weekday() + 7)
-    for day in range(days):
-        date = start_date + timedelta(days=day)
-        for station in stations:
-            for hour in range(24):
-                if 8 <= hour <= 10 or 17 <= hour <= 20:
-                    vehicles_charged = np.random.poisson(10) + 5
-                    traffic_congestion = "High"
-                elif 7 <= hour < 8 or 10 < hour < 12 or 16 <= hour < 17 or 20 < hour < 22:
-                    vehicles_charged = np.random.poisson(5) + 2
-                    traffic_congestion = "Medium"
-                else:
-                    vehicles_charged = np.random.poisson(2)
-                    traffic_congestion = "Low"
-                vehicle_type = random.choices(vehicle_types, weights=[0.7, 0.3])[0]
-                avg_session_minutes = round(np.random.normal(40 if vehicle_type=="car" else 25, 8), 1)
-                rows.append({
-                    "station_id": station["station_id"],
-                    "station_name": station["station_name"],
-                    "latitude": station["latitude"],
-                    "longitude": station["longitude"],
-                    "date": date.strftime("%d-%m-%Y"),
-                    "hour": hour,
-                    "vehicles_charged": max(0, vehicles_charged),
-                    "vehicle_type": vehicle_type,
-                    "avg_session_minutes": max(10, avg_session_minutes),
-                    "traffic_congestion": traffic_congestion
-                })
-    df = pd.DataFrame(rows)
+    return today - timedelta(days=today.weekday() + 7)
+
+
+def _as_date(value):
+    if value is None:
+        return default_start_date()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, _date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def make_stations(n_stations=None, rng=None):
+    # First the fixed Delhi stations, then synthetic ones placed inside DELHI_BOUNDS
+    if n_stations is None:
+        n_stations = len(STATIONS)
+    stations = [dict(s) for s in STATIONS[:n_stations]]
+    extra = n_stations - len(stations)
+    if extra > 0:
+        rng = rng if rng is not None else np.random.default_rng()
+        lats = np.round(rng.uniform(*DELHI_BOUNDS["lat"], size=extra), 4)
+        lons = np.round(rng.uniform(*DELHI_BOUNDS["lon"], size=extra), 4)
+        for i in range(extra):
+            station_id = len(STATIONS) + i + 1
+            stations.append({
+                "station_id": station_id,
+                "station_name": f"Station {station_id}",
+                "latitude": float(lats[i]),
+                "longitude": float(lons[i]),
+            })
+    return stations
+
+
+def simulate_ev_data(n_stations=None, days=7, start_date=None, seed=None, stations=None):
+    # One row per day x station x hour, drawn as whole arrays instead of row by row.
+    # The same seed always produces the same frame.
+    rng = np.random.default_rng(seed)
+    if stations is None:
+        stations = make_stations(n_stations, rng)
+    start_date = _as_date(start_date)
+    n_st = len(stations)
+    shape = (days, n_st, 24)
+
+    hours = np.broadcast_to(np.arange(24), shape)
+    vehicles_charged = rng.poisson(np.broadcast_to(HOUR_LAMBDA, shape)) + HOUR_OFFSET
+    is_scooter = rng.random(shape) >= VEHICLE_WEIGHTS[0]
+    session_mean = np.where(is_scooter, SESSION_MEAN["scooter"], SESSION_MEAN["car"])
+    avg_session_minutes = np.maximum(MIN_SESSION_MINUTES, np.round(rng.normal(session_mean, SESSION_STD), 1))
+
+    station_idx = np.broadcast_to(np.arange(n_st)[None, :, None], shape).ravel()
+    day_idx = np.broadcast_to(np.arange(days)[:, None, None], shape).ravel()
+    station_ids = np.array([s["station_id"] for s in stations])
+    station_names = np.array([s["station_name"] for s in stations], dtype=object)
+    latitudes = np.array([s["latitude"] for s in stations], dtype=float)
+    longitudes = np.array([s["longitude"] for s in stations], dtype=float)
+    date_labels = np.array(
+        [(start_date + timedelta(days=d)).strftime("%d-%m-%Y") for d in range(days)], dtype=object
+    )
+
+    df = pd.DataFrame({
+        "station_id": station_ids[station_idx],
+        "station_name": station_names[station_idx],
+        "latitude": latitudes[station_idx],
+        "longitude": longitudes[station_idx],
+        "date": date_labels[day_idx],
+        "hour": hours.ravel(),
+        "vehicles_charged": np.maximum(0, vehicles_charged).ravel(),
+        "vehicle_type": np.array(VEHICLE_TYPES, dtype=object)[is_scooter.ravel().astype(np.int64)],
+        "avg_session_minutes": avg_session_minutes.ravel(),
+        "traffic_congestion": np.array(CONGESTION_LEVELS, dtype=object)[np.broadcast_to(HOUR_CONGESTION, shape).ravel()],
+    })
     return df
+
+
+def iter_ev_data_chunks(n_stations=None, days=7, start_date=None, seed=None, chunk_by="day", stations=None):
+    # Yields the simulation one day (or one station) at a time so peak memory
+    # depends on the chunk size, not the horizon. Every chunk has its own child
+    # seed, so a given seed always streams the same chunks.
+    if chunk_by not in ("day", "station"):
+        raise ValueError(f"chunk_by must be 'day' or 'station', got {chunk_by!r}")
+    seq = np.random.SeedSequence(seed)
+    station_seq, chunk_seq = seq.spawn(2)
+    if stations is None:
+        stations = make_stations(n_stations, np.random.default_rng(station_seq))
+    start_date = _as_date(start_date)
+    if chunk_by == "day":
+        for day, child in enumerate(chunk_seq.spawn(days)):
+            yield simulate_ev_data(days=1, start_date=start_date + timedelta(days=day),
+                                   seed=child, stations=stations)
+    else:
+        for station, child in zip(stations, chunk_seq.spawn(len(stations))):
+            yield simulate_ev_data(days=days, start_date=start_date, seed=child, stations=[station])
+
+
+def _partition_schema():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([("day", pa.string())]), flavor="hive")
+
+
+def write_ev_data_parquet(root, n_stations=None, days=7, start_date=None, seed=None, chunk_by="day"):
+    # Streams chunks straight to Parquet files under root/day=YYYY-MM-DD/. Any
+    # existing partitions are removed first, so a rewrite replaces the dataset; per-chunk
+    # delete_matching would drop earlier chunks when chunk_by="station" shares days.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    if os.path.isdir(root):
+        for name in os.listdir(root):
+            if name.startswith("day="):
+                shutil.rmtree(os.path.join(root, name))
+    rows = 0
+    chunks = iter_ev_data_chunks(n_stations, days, start_date, seed, chunk_by)
+    for i, chunk in enumerate(chunks):
+        chunk["day"] = pd.to_datetime(chunk["date"], format="%d-%m-%Y").dt.strftime("%Y-%m-%d")
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        pq.write_to_dataset(table, root, partitioning=_partition_schema(),
+                            basename_template=f"part-{i:05d}-{{i}}.parquet",
+                            existing_data_behavior="overwrite_or_ignore")
+        rows += len(chunk)
+    return rows
+
+
+def read_ev_data(root, start=None, end=None, stations=None, columns=None):
+    # Reads a partitioned dataset back, pruning partitions outside [start, end]
+    # and filtering stations before anything is materialised
+    import pyarrow.parquet as pq
+    filters = []
+    if start is not None:
+        filters.append(("day", ">=", pd.Timestamp(start).strftime("%Y-%m-%d")))
+    if end is not None:
+        filters.append(("day", "<=", pd.Timestamp(end).strftime("%Y-%m-%d")))
+    if stations is not None:
+        filters.append(("station_name", "in", list(stations)))
+    table = pq.read_table(root, columns=columns, filters=filters or None,
+                          partitioning=_partition_schema(), memory_map=True)
+    df = table.to_pandas()
+    df = df.drop(columns=["day"], errors="ignore")
+    if "date" in df.columns:
+        # Same day -> station -> hour order as simulate_ev_data
+        sort_cols = ["_day"] + [c for c in ("station_id", "hour") if c in df.columns]
+        df = df.assign(_day=pd.to_datetime(df["date"], format="%d-%m-%Y"))
+        df = df.sort_values(sort_cols, kind="stable").drop(columns="_day").reset_index(drop=True)
+    return df
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Simulate hourly EV charging demand")
+    parser.add_argument("--stations", type=int, default=len(STATIONS))
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--start-date", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--chunk-by", choices=["day", "station"], default="day")
+    parser.add_argument("--out", default="ev_demand_data",
+                        help="Directory for the day-partitioned Parquet dataset, or a .csv path")
+    args = parser.parse_args()
+    if args.out.endswith(".csv"):
+        simulate_ev_data(args.stations, args.days, args.start_date, args.seed).to_csv(args.out, index=False)
+    else:
+        n = write_ev_data_parquet(args.out, args.stations, args.days, args.start_date, args.seed, args.chunk_by)
+        print(f"Wrote {n} rows to {args.out}")
@@ -0,0 +1,191 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Hours (start of the hour) counted as daytime: 09:00 to 17:00
+DAYTIME_HOURS = range(9, 17)
+RANK_METRICS = ["window_mean", "daytime_total", "daytime_share"]
+
+
+def _day_and_hour(df):
+    # simulate_ev_data rows (date "dd-mm-YYYY" + hour) or forecast rows (ds)
+    if "ds" in df.columns:
+        ds = pd.to_datetime(df["ds"])
+        return ds.dt.normalize(), ds.dt.hour
+    dates = pd.unique(df["date"])
+    parsed = pd.Series(pd.to_datetime(dates, format="%d-%m-%Y"), index=dates)
+    return df["date"].map(parsed), df["hour"]
+
+
+class SolarSuitability:
+    # Running daytime-demand statistics per station for ranking solar sites.
+    # Per station it keeps all-time daytime and total demand plus a ring buffer of the
+    # last window_days daily daytime totals with running sum and sum of squares, so
+    # adding a day costs O(stations) however long the history is. Days must arrive in
+    # order; a day may be split across consecutive chunks (e.g. read_csv chunksize).
+
+    def __init__(self, window_days=30, daytime_hours=DAYTIME_HOURS):
+        self.window_days = window_days
+        self.daytime_hours = np.asarray(list(daytime_hours))
+        self.names = []
+        self._index = pd.Index([])
+        self.days = 0
+        self.last_day = None
+        self._pos = 0
+        capacity = 16
+        self.daytime_total = np.zeros(capacity)
+        self.total = np.zeros(capacity)
+        self._ring = np.zeros((capacity, window_days))
+        self._ring_total = np.zeros((capacity, window_days))
+        self._window_sum = np.zeros(capacity)
+        self._window_sq = np.zeros(capacity)
+        self._window_total = np.zeros(capacity)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _slots(self, names):
+        # Slot per station name, registering new stations (arrays grow by doubling)
+        slots = self._index.get_indexer(names)
+        new = pd.unique(np.asarray(names, dtype=object)[slots < 0])
+        if len(new):
+            self.names.extend(new)
+            self._index = pd.Index(self.names)
+            if len(self.names) > len(self.total):
+                self._grow(len(self.names))
+            slots = self._index.get_indexer(names)
+        return slots
+
+    def _grow(self, n):
+        capacity = max(n, 2 * len(self.total))
+        for attr in ["daytime_total", "total", "_window_sum", "_window_sq", "_window_total"]:
+            old = getattr(self, attr)
+            grown = np.zeros(capacity)
+            grown[:len(old)] = old
+            setattr(self, attr, grown)
+        for attr in ["_ring", "_ring_total"]:
+            old = getattr(self, attr)
+            grown = np.zeros((capacity, self.window_days))
+            grown[:len(old)] = old
+            setattr(self, attr, grown)
+
+    def add_day(self, day, stations, daytime, total=None):
+        # One day's daytime (and optionally total) demand per station; stations not
+        # listed count as zero for that day. Adding the latest day again adds to it, so
+        # a day split across chunks can arrive in pieces; earlier days raise ValueError.
+        day = pd.Timestamp(day).normalize()
+        if self.last_day is not None and day < self.last_day:
+            raise ValueError(f"days must be added in order: {day.date()} is before {self.last_day.date()}")
+        slots = self._slots(stations)
+        daytime_day = np.zeros(len(self.total))
+        np.add.at(daytime_day, slots, np.asarray(daytime, dtype=float))
+        total_day = np.zeros(len(self.total))
+        if total is not None:
+            np.add.at(total_day, slots, np.asarray(total, dtype=float))
+
+        n = len(self.names)
+        same_day = day == self.last_day
+        pos = (self._pos - 1) % self.window_days if same_day else self._pos
+        old = self._ring[:n, pos]
+        old_total = self._ring_total[:n, pos]
+        new = daytime_day[:n] + old if same_day else daytime_day[:n]
+        new_total = total_day[:n] + old_total if same_day else total_day[:n]
+        self._window_sum[:n] += new - old
+        self._window_sq[:n] += new ** 2 - old ** 2
+        self._window_total[:n] += new_total - old_total
+        self._ring[:n, pos] = new
+        self._ring_total[:n, pos] = new_total
+        self.daytime_total[:n] += daytime_day[:n]
+        self.total[:n] += total_day[:n]
+        if not same_day:
+            self._pos = (pos + 1) % self.window_days
+            self.days += 1
+            self.last_day = day
+
+    def update(self, df, value_col=None):
+        # Folds a frame of hourly rows (simulate_ev_data or forecast output) into the
+        # statistics, one add_day per day in order. Only this frame is aggregated; its
+        # first day may continue the last day of the previous frame.
+        if value_col is None:
+            value_col = "vehicles_charged" if "vehicles_charged" in df.columns else "yhat"
+        if len(df) == 0:
+            return self
+        day, hour = _day_and_hour(df)
+        frame = pd.DataFrame({
+            "day": day.to_numpy(),
+            "station_name": df["station_name"].to_numpy(),
+            "value": df[value_col].clip(lower=0).to_numpy(dtype=float),
+        })
+        frame["daytime"] = np.where(np.isin(hour.to_numpy(), self.daytime_hours), frame["value"], 0.0)
+        daily = frame.groupby(["day", "station_name"], sort=True)[["daytime", "value"]].sum()
+        for d, rows in daily.groupby(level="day", sort=True):
+            self.add_day(d, rows.index.get_level_values("station_name"), rows["daytime"], rows["value"])
+        return self
+
+    def stats(self):
+        # Current statistics for every station
+        n = len(self.names)
+        days = min(self.days, self.window_days)
+        mean = self._window_sum[:n] / max(days, 1)
+        var = self._window_sq[:n] / max(days, 1) - mean ** 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.where(self._window_total[:n] > 0, self._window_sum[:n] / self._window_total[:n], np.nan)
+        return pd.DataFrame({
+            "station_name": self.names,
+            "daytime_total": self.daytime_total[:n],
+            "window_days": days,
+            "window_mean": mean,
+            "window_std": np.sqrt(np.clip(var, 0, None)),
+            "daytime_share": share,
+        })
+
+    def top(self, n=5, by="window_mean"):
+        # Top n stations by a statistic; argpartition keeps this O(stations)
+        if by not in RANK_METRICS:
+            raise ValueError(f"by must be one of {RANK_METRICS}, got {by!r}")
+        stats = self.stats()
+        values = np.nan_to_num(stats[by].to_numpy(), nan=-np.inf)
+        if len(values) > n:
+            idx = np.argpartition(-values, n - 1)[:n]
+        else:
+            idx = np.arange(len(values))
+        idx = idx[np.argsort(-values[idx], kind="stable")]
+        result = stats.iloc[idx].reset_index(drop=True)
+        result.insert(0, "rank", np.arange(1, len(result) + 1))
+        return result
+
+    @classmethod
+    def from_dataset(cls, root, start=None, end=None, **kwargs):
+        # Streams a day-partitioned ev_demand_data/ dataset one day at a time, reading
+        # each root/day=YYYY-MM-DD/ directory directly rather than rediscovering the dataset
+        import pyarrow.parquet as pq
+        engine = cls(**kwargs)
+        start = None if start is None else pd.Timestamp(start).strftime("%Y-%m-%d")
+        end = None if end is None else pd.Timestamp(end).strftime("%Y-%m-%d")
+        days = sorted(name[len("day="):] for name in os.listdir(root) if name.startswith("day="))
+        for day in days:
+            if (start is not None and day < start) or (end is not None and day > end):
+                continue
+            table = pq.read_table(os.path.join(root, f"day={day}"),
+                                  columns=["station_name", "date", "hour", "vehicles_charged"])
+            engine.update(table.to_pandas())
+        return engine
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Rank stations for solar-powered charging by daytime demand")
+    parser.add_argument("--input", default="ev_demand_data", help="Day-partitioned Parquet dataset or CSV file")
+    parser.add_argument("--window-days", type=int, default=30)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--by", choices=RANK_METRICS, default="window_mean")
+    args = parser.parse_args()
+    if os.path.isdir(args.input):
+        engine = SolarSuitability.from_dataset(args.input, window_days=args.window_days)
+    else:
+        engine = SolarSuitability(args.window_days)
+        for chunk in pd.read_csv(args.input, chunksize=500_000):
+            engine.update(chunk)
+    print(f"{len(engine)} stations over {engine.days} days")
+    print(engine.top(args.top, args.by).to_string(index=False))
@@ -0,0 +1,234 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import numbers
+import random
+import threading
+import time
+from collections import deque
+
+from recommender import simulate_station_data, stations
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Fields of a full station record (as from simulate_station_data); a station the store
+# has not seen must arrive with all of them before partial updates are accepted
+STATE_FIELDS = ("name", "lat", "lon", "car_ports", "scooter_ports", "car_waiting", "scooter_waiting",
+                "car_session", "scooter_session", "traffic_speed")
+
+logger = logging.getLogger(__name__)
+
+
+class StationStateStore:
+    # Latest state per station plus a fixed-size ring buffer of recent updates.
+    # Every update stores a new dict instead of mutating the old one, so readers can
+    # take a snapshot without locks while the feed keeps writing.
+
+    def __init__(self, history_size=120):
+        self.history_size = history_size
+        self._latest = {}
+        self._history = {}
+        self._history_lock = threading.Lock()
+        self.updates = 0
+
+    def __len__(self):
+        return len(self._latest)
+
+    def apply(self, update):
+        # Merges a (possibly partial) update for update["name"] into its latest state.
+        # Partial updates for unknown stations raise KeyError, and non-numeric or
+        # non-finite station fields raise TypeError/ValueError, instead of storing a
+        # record that would break every reader of the shared store.
+        name = update["name"]
+        if not isinstance(name, str):
+            raise TypeError(f"station name must be a string, got {name!r}")
+        for field in STATE_FIELDS[1:]:
+            if field in update:
+                value = update[field]
+                if isinstance(value, bool) or not isinstance(value, numbers.Real):
+                    raise TypeError(f"{field} must be a number, got {value!r}")
+                if not math.isfinite(value):
+                    raise ValueError(f"{field} must be finite, got {value!r}")
+        previous = self._latest.get(name)
+        if previous is None:
+            missing = [f for f in STATE_FIELDS if f not in update]
+            if missing:
+                raise KeyError(f"unknown station {name!r}; a first update needs {missing}")
+        state = {**(previous or {}), **update}
+        if "ts" not in update:
+            state["ts"] = time.time()
+        self._latest[name] = state
+        with self._history_lock:
+            ring = self._history.get(name)
+            if ring is None:
+                ring = self._history[name] = deque(maxlen=self.history_size)
+            ring.append(state)
+        self.updates += 1
+        return state
+
+    def snapshot(self, names=None):
+        # Latest state of every station (or of `names`, in that order)
+        latest = self._latest.copy()
+        if names is None:
+            return list(latest.values())
+        return [latest[n] for n in names if n in latest]
+
+    def get(self, name):
+        return self._latest.get(name)
+
+    def history(self, name):
+        with self._history_lock:
+            return list(self._history.get(name, ()))
+
+
+class StationFeedService:
+    # Asyncio service that ingests station updates and applies them to a shared store.
+    # Updates come from submit() (any thread), from the in-process simulator, or as
+    # JSON lines over TCP from a local simulator process or real chargers.
+    # start() runs the event loop in a daemon thread so Streamlit sessions can share it.
+
+    def __init__(self, store=None, history_size=120):
+        self.store = store if store is not None else StationStateStore(history_size)
+        self.loop = None
+        self.server = None
+        self._queue = None
+        self._thread = None
+        self._tasks = []
+        self._ready = threading.Event()
+        self.rejected = 0
+
+    async def ingest(self, update):
+        await self._queue.put(update)
+
+    def submit(self, update):
+        # Thread-safe, non-blocking ingest from outside the event loop
+        self.loop.call_soon_threadsafe(self._queue.put_nowait, update)
+
+    async def _consume(self):
+        while True:
+            update = await self._queue.get()
+            try:
+                self.store.apply(update)
+            except (KeyError, TypeError, ValueError) as exc:
+                self.rejected += 1
+                logger.warning("Skipping station update %r: %s", update, exc)
+            finally:
+                self._queue.task_done()
+
+    async def _handle_client(self, reader, writer):
+        # One JSON object (or a list of them) per line
+        try:
+            while line := await reader.readline():
+                try:
+                    payload = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                for update in payload if isinstance(payload, list) else [payload]:
+                    await self.ingest(update)
+        finally:
+            writer.close()
+
+    async def _main(self, host, port, simulate, interval):
+        self._queue = asyncio.Queue()
+        self._tasks.append(asyncio.create_task(self._consume()))
+        if port is not None:
+            try:
+                self.server = await asyncio.start_server(self._handle_client, host, port)
+            except OSError:
+                # Another process already owns the port; keep serving in-process updates
+                self.server = None
+        if simulate:
+            # Continue from whatever state the store was seeded with
+            initial = self.store.snapshot() or None
+            self._tasks.append(asyncio.create_task(simulate_feed(self.ingest, initial=initial, interval=interval)))
+        self._ready.set()
+        await asyncio.Event().wait()
+
+    def start(self, host=DEFAULT_HOST, port=None, simulate=False, interval=1.0):
+        if self._thread is not None:
+            return self
+        self.loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            try:
+                self.loop.run_until_complete(self._main(host, port, simulate, interval))
+            except asyncio.CancelledError:
+                pass
+
+        self._thread = threading.Thread(target=run, name="station-feed", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self.loop is None:
+            return
+
+        def shutdown():
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            if self.server is not None:
+                self.server.close()
+
+        self.loop.call_soon_threadsafe(shutdown)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+
+def random_walk(state, rng):
+    # Next state of one station: queues and traffic drift, ports stay fixed
+    update = {"name": state["name"]}
+    for vtype in ["car", "scooter"]:
+        ports = state[f"{vtype}_ports"]
+        waiting = state[f"{vtype}_waiting"] + rng.choice([-1, 0, 0, 1])
+        update[f"{vtype}_waiting"] = min(max(waiting, 0), 2 * ports)
+    update["traffic_speed"] = min(max(state["traffic_speed"] + rng.choice([-2, -1, 0, 1, 2]), 10), 40)
+    return update
+
+
+async def simulate_feed(ingest, station_list=None, initial=None, interval=1.0, iterations=None, seed=None):
+    # Stands in for real chargers: a full initial state (sent unless given), then a
+    # random-walk update per station each interval
+    rng = random.Random(seed)
+    if initial is None:
+        initial = simulate_station_data(stations if station_list is None else station_list)
+        for state in initial:
+            await ingest(dict(state))
+    current = {s["name"]: s for s in initial}
+    step = 0
+    while iterations is None or step < iterations:
+        await asyncio.sleep(interval)
+        for name, state in current.items():
+            update = random_walk(state, rng)
+            current[name] = {**state, **update}
+            await ingest(update)
+        step += 1
+
+
+async def run_simulator_client(host=DEFAULT_HOST, port=DEFAULT_PORT, interval=1.0, iterations=None, seed=None):
+    # Local simulator process: streams updates to a running StationFeedService as JSON lines
+    _, writer = await asyncio.open_connection(host, port)
+
+    async def send(update):
+        writer.write(json.dumps(update).encode() + b"\n")
+        await writer.drain()
+
+    try:
+        await simulate_feed(send, interval=interval, iterations=iterations, seed=seed)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated station-state feed for the EV Station Recommender")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between update rounds")
+    parser.add_argument("--iterations", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(run_simulator_client(args.host, args.port, args.interval, args.iterations, args.seed))
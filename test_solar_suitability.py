@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulate_ev_data import simulate_ev_data, write_ev_data_parquet
+from solar_suitability import SolarSuitability
+
+
+def test_day_split_across_chunks_matches_single_update():
+    df = simulate_ev_data(5, 4, seed=0)
+    whole = SolarSuitability(window_days=3).update(df)
+    chunked = SolarSuitability(window_days=3)
+    # Chunk boundaries fall inside days, as with pd.read_csv(chunksize=...)
+    for start in range(0, len(df), 70):
+        chunked.update(df.iloc[start:start + 70])
+    assert chunked.days == whole.days == 4
+    pd.testing.assert_frame_equal(chunked.stats().set_index("station_name").sort_index(),
+                                  whole.stats().set_index("station_name").sort_index())
+
+
+def test_earlier_day_is_rejected():
+    df = simulate_ev_data(2, 2, seed=0)
+    engine = SolarSuitability().update(df)
+    first_day = df[df["date"] == df["date"].iloc[0]]
+    with pytest.raises(ValueError):
+        engine.update(first_day)
+
+
+def test_from_dataset_matches_in_memory(tmp_path):
+    write_ev_data_parquet(tmp_path, n_stations=4, days=3, seed=1)
+    from simulate_ev_data import read_ev_data
+    expected = SolarSuitability(window_days=2).update(read_ev_data(tmp_path)).stats()
+    stats = SolarSuitability.from_dataset(tmp_path, window_days=2).stats()
+    order = stats.set_index("station_name").loc[expected["station_name"]].reset_index()
+    np.testing.assert_allclose(order["window_mean"], expected["window_mean"])
+    np.testing.assert_allclose(order["daytime_total"], expected["daytime_total"])